@@ -6,11 +6,12 @@
 # - update EZlab.init_UI and EZlab.update_controls
 
 import sys
-import numpy as np
 import pyqtgraph as pg
 import time
 import signal
 import os
+import threading
+from concurrent.futures import Future
 #import math
 from PyQt5.QtGui import QFont, QDoubleValidator
 from PyQt5.QtWidgets import QLabel, QSpinBox, QCheckBox, QComboBox
@@ -32,6 +33,12 @@ import config.config as EZconfig
 
 # import devices drivers
 import devices
+import devices.discovery
+import devices.driver_base
+import devices.ringbuffer
+# background writer of the save files
+import storage.writer
+import storage.session
 
 
 f_debug = True
@@ -39,8 +46,9 @@ f_debug = True
 if f_debug:
     print('Available driver:',devices.available_driver)
 
-if f_debug:
-    print('Available Instruments:',devices.available_instr)
+def print_instruments(instruments):
+    if f_debug:
+        print('Available Instruments:',instruments)
 
 str_about = '© 2019-2021 Matthias H. Richter v2021124a\nMatthias.H.Richter@gmail.com\nhttps://github.com/Yohko/EZlab'
 
@@ -50,6 +58,17 @@ def signal_handler(sig, frame):
     QApplication.closeAllWindows()
 
 
+def init_device(future, dev_driver, config):
+    # runs in its own thread: connect and initialize one device
+    try:
+        GUI_thread = devices.load_driver(dev_driver)(config)
+        # the driver object belongs to the GUI thread like before
+        GUI_thread.moveToThread(QApplication.instance().thread())
+        future.set_result(GUI_thread)
+    except Exception as e:
+        future.set_exception(e)
+
+
 class EZlab(QMainWindow):
 
     def __init__(self):
@@ -63,6 +82,29 @@ class EZlab(QMainWindow):
         self.width=640
         self.height=200
         self.newfont = QFont("Times", 20, QFont.Bold)
+        # cached or background scan of the connected instruments, started
+        # once all devices are initialized (check_init)
+        self.lastscan = 0.0
+        # optional: all driver loops on one event loop instead of a thread each
+        self.engine = None
+        if hasattr(EZconfig, 'EZlabengine') and EZconfig.EZlabengine == 'asyncio':
+            from devices import engine
+            self.engine = engine.engine(EZconfig.EZlabworkers)
+            self.engine.start()
+        # rollup tiers of the save files
+        if hasattr(EZconfig, 'EZlabrollup'):
+            storage.writer.get().tiers = EZconfig.EZlabrollup
+        # optional: all channels of all instruments in one session file
+        if hasattr(EZconfig, 'EZlabsession') and EZconfig.EZlabsession != '':
+            if hasattr(EZconfig, 'EZlabTreorder'):
+                Treorder = EZconfig.EZlabTreorder
+            else:
+                Treorder = 10.0
+            if hasattr(EZconfig, 'EZlabsessionformat'):
+                sessionformat = EZconfig.EZlabsessionformat
+            else:
+                sessionformat = 'ezb'
+            storage.session.start('%s_%s.%s' % (EZconfig.EZlabsession, time.strftime('%Y%m%d_%H%M%S'), sessionformat), Treorder)
         self.init_UI()
 
 
@@ -110,6 +152,14 @@ class EZlab(QMainWindow):
             if 'dev_Tdriver' not in self.config['Instruments'][devkey]:
                 self.config['Instruments'][devkey]['dev_Tdriver'] = 0.2
 
+            # reply deadline for a single serial query in sec
+            if 'dev_Tquery' not in self.config['Instruments'][devkey]:
+                self.config['Instruments'][devkey]['dev_Tquery'] = 1.0
+
+            # overrun of the driver loop period: 'skip' or 'catchup' missed cycles
+            if 'dev_overrun' not in self.config['Instruments'][devkey]:
+                self.config['Instruments'][devkey]['dev_overrun'] = 'skip'
+
 
     def check_deverror(self, devidx, devkey):
         if (self.config['Instruments'][devkey]['GUI_thread'].error) and not (self.config['Instruments'][devkey]['GUI_disp'][devidx].text() == 'ERROR'):
@@ -183,417 +233,506 @@ class EZlab(QMainWindow):
                             print(' ... group %s exists' % (groupname))
 
 
-                    ###############################################################
-                    # Instrument specific GUI elements etc
-                    ###############################################################
+                    # slot of the device: its own grid in the next row of the
+                    # group (config order, whatever device is ready first),
+                    # filled by add_device(devkey, devkey) once initialized
+                    self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+                    self.config['GUI_groups'][devkey] = dict()
+                    self.config['GUI_groups'][devkey]['elements'] = -1
+                    self.config['GUI_groups'][devkey]['layout'] = QGridLayout()
+                    self.config['GUI_groups'][devkey]['layout'].setContentsMargins(0, 0, 0, 0)
+                    self.config['GUI_groups'][groupname]['layout'].addLayout(self.config['GUI_groups'][devkey]['layout'], self.config['GUI_groups'][groupname]['elements'], 0, 1, -1)
 
-                    ###############################################################
-                    # K2100
-                    ###############################################################
-                    if dev_driver == 'K2100':
-                        if f_debug:
-                            print(' ... adding K2100 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_K2100.driver_K2100(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
-                        for mode in self.config['Instruments'][devkey]['GUI_thread'].modes: 
-                            self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
-                        self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
-                            self.config['Instruments'][devkey]['dev_type']
-                            )))
-                        self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 4)
-
-                    ###############################################################
-                    # K2000
-                    ###############################################################
-                    elif dev_driver == 'K2000':
-                        if f_debug:
-                            print(' ... adding K2000 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_K2000.driver_K2000(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
-                        for mode in self.config['Instruments'][devkey]['GUI_thread'].modes: 
-                            self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
-                        self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
-                            self.config['Instruments'][devkey]['dev_type']
-                            )))
-                        self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)                        
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 4)
+                    # placeholder until the device is initialized
+                    if isinstance(self.config['Instruments'][devkey]['dev_label'],list):
+                        self.config['Instruments'][devkey]['GUI_init'] = QLabel('%s: connecting ...' % ', '.join(self.config['Instruments'][devkey]['dev_label']))
+                    else:
+                        self.config['Instruments'][devkey]['GUI_init'] = QLabel('%s: connecting ...' % self.config['Instruments'][devkey]['dev_label'])
+                    self.config['GUI_groups'][devkey]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_init'], 0, 0, 1, 3)
 
-                    ###############################################################
-                    # K2182A
-                    ###############################################################
-                    elif dev_driver == 'K2182A':
-                        if f_debug:
-                            print(' ... adding K2182A device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_K2182A.driver_K2182A(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+                    # connect and initialize the device in the background
+                    self.config['Instruments'][devkey]['GUI_future'] = Future()
+                    threading.Thread(target=init_device,
+                                     args=(self.config['Instruments'][devkey]['GUI_future'],
+                                           dev_driver,
+                                           self.config['Instruments'][devkey]),
+                                     daemon=True).start()
 
-                    ###############################################################
-                    # K2400
-                    ###############################################################
-                    elif dev_driver == 'K2400':
-                        if f_debug:
-                            print(' ... adding K2400 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_K2400.driver_K2400(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
-                        for mode in self.config['Instruments'][devkey]['GUI_thread'].modes:
-                            self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
-                        self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
-                            self.config['Instruments'][devkey]['dev_type']
-                            )))
-                        self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)
-                        self.config['Instruments'][devkey]['GUI_setP_edit']={0:QLineEdit()}
-                        self.config['Instruments'][devkey]['GUI_setP_edit'][0].setValidator(QDoubleValidator(-5.00,+5.00,9))
-                        self.config['Instruments'][devkey]['GUI_setP_edit'][0].setText('0.0')
-                        # does not work
-                        #self.config['Instruments'][devkey]['GUI_setP_edit'][0].editingFinished.connect(self.changed_setP)
-                        # does not work
-                        #self.config['Instruments'][devkey]['GUI_setP_edit'][0].returnPressed.connect(self.changed_setP)
-                        self.config['Instruments'][devkey]['GUI_setP_edit'][0].textEdited.connect(self.changed_setP)
-                        self.config['Instruments'][devkey]['GUI_compl_edit']={0:QLineEdit()}
-                        self.config['Instruments'][devkey]['GUI_compl_edit'][0].setValidator(QDoubleValidator(0.00,42,9))
-                        self.config['Instruments'][devkey]['GUI_compl_edit'][0].setText(str(self.config['Instruments'][devkey]['dev_compliance']))
-                        # does not work
-                        #self.config['Instruments'][devkey]['GUI_compl_edit'][0].editingFinished.connect(self.changed_compl)
-                        # does not work
-                        #self.config['Instruments'][devkey]['GUI_compl_edit'][0].returnPressed.connect(self.changed_compl)
-                        self.config['Instruments'][devkey]['GUI_compl_edit'][0].textEdited.connect(self.changed_compl)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_setP_edit'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(QLabel('Compliance'), self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_compl_edit'][0], self.config['GUI_groups'][groupname]['elements'], 2)
 
-                    ###############################################################
-                    # Newport69931
-                    ###############################################################
-                    elif dev_driver == 'Newport69931':
-                        if f_debug:
-                            print(' ... adding Newport69931 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_Newport69931.driver_Newport69931(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        if self.config['Instruments'][devkey]['GUI_thread'].state:
-                            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+        # add about section
+        self.MainLayout.addWidget(QLabel(str_about), maxrow, 0, 1, 2)
+        self.statuslabel = QLabel('no Error')
+        self.MainLayout.addWidget(self.statuslabel, maxrow, 2, 1, 1)
+        self.scanbutton = QPushButton('scan instruments')
+        self.scanbutton.clicked.connect(self.clicked_scan)
+        self.scanbutton.setEnabled(False) # until all devices are initialized
+        self.MainLayout.addWidget(self.scanbutton, maxrow, 3, 1, 1)
 
-                    ###############################################################
-                    # Newport68945
-                    ###############################################################
-                    elif dev_driver == 'Newport68945':
-                        if f_debug:
-                            print(' ... adding Newport69931 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_Newport68945.driver_Newport68945(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        if self.config['Instruments'][devkey]['GUI_thread'].state:
-                            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+        # add the widgets of each device as soon as it is ready
+        self.inittime = time.monotonic()
+        self.inittimer = QTimer(self)
+        self.inittimer.timeout.connect(self.check_init)
+        self.inittimer.start(100)
 
-                    ###############################################################
-                    # LambdaSC
-                    ###############################################################
-                    elif dev_driver == 'LambdaSC':
-                        if f_debug:
-                            print(' ... adding LambdaSC device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_LambdaSC.driver_LambdaSC(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        if self.config['Instruments'][devkey]['GUI_thread'].state:
-                            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
-                        self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+        timer = QTimer(self)
+        timer.timeout.connect(self.update_controls)
+        timer.start(500)
+        self.show()
 
-                    ###############################################################
-                    # RHUSB
-                    ###############################################################
-                    elif dev_driver == 'RHUSB':
-                        if f_debug:
-                            print(' ... adding RHUSB device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_RHUSB.driver_RHUSB(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
 
-                    ###############################################################
-                    # SPERSCI80005
-                    ###############################################################
-                    elif dev_driver == 'SPERSCI80005':
-                        if f_debug:
-                            print(' ... adding SPERSCI80005 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_SPERSCI80005.driver_SPERSCI80005(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # create GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
-                        self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
-                        self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
-                        # add GUI elements to group
-                        self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
-                        self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+    def check_init(self):
+        pending = 0
+        for devidx, devkey in enumerate(list(self.config['Instruments'].keys())):
+            if 'GUI_future' not in self.config['Instruments'][devkey]:
+                continue
+            if not self.config['Instruments'][devkey]['GUI_future'].done():
+                pending = pending + 1
+                continue
+            try:
+                GUI_thread = self.config['Instruments'][devkey]['GUI_future'].result()
+            except Exception as e:
+                # keep the placeholder to show the failure of this device
+                print('Error initializing ' + devkey + ': ' + str(e))
+                self.config['Instruments'][devkey]['GUI_init'].setText(
+                    self.config['Instruments'][devkey]['GUI_init'].text().replace('connecting ...', 'ERROR'))
+                self.config['Instruments'][devkey]['GUI_init'].setToolTip(str(e))
+                del self.config['Instruments'][devkey]['GUI_future']
+                continue
+            del self.config['Instruments'][devkey]['GUI_future']
+            if f_debug:
+                print(' ... %s ready after %.1f s' % (devkey, time.monotonic()-self.inittime))
+            self.config['GUI_groups'][devkey]['layout'].removeWidget(self.config['Instruments'][devkey]['GUI_init'])
+            self.config['Instruments'][devkey]['GUI_init'].deleteLater()
+            del self.config['Instruments'][devkey]['GUI_init']
+            # start device thread and create its GUI elements
+            self.config['Instruments'][devkey]['GUI_thread'] = GUI_thread
+            if self.engine is not None:
+                self.engine.add(self.config['Instruments'][devkey]['GUI_thread'])
+            else:
+                self.config['Instruments'][devkey]['GUI_thread'].start()
+            # into the slot of the device
+            self.add_device(devkey, devkey)
+        if pending == 0:
+            self.inittimer.stop()
+            ready = len([devkey for devkey in self.config['Instruments'] if 'GUI_thread' in self.config['Instruments'][devkey]])
+            buf = '%d devices ready, startup: %.1f s' % (ready, time.monotonic()-self.inittime)
+            print(' ... ' + buf)
+            self.statuslabel.setText(buf)
+            devices.discovery.start(callback=print_instruments, ports=self.configured_ports())
 
-                    ###############################################################
-                    # PTC10
-                    ###############################################################
-                    elif dev_driver == 'PTC10':
-                        if f_debug:
-                            print(' ... adding PTC10 device ...')
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_PTC10.driver_PTC10(
-                                self.config['Instruments'][devkey]
-                                )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # add empty dicts for GUI elements
-                        self.config['Instruments'][devkey]['GUI_disp'] = dict()
-                        self.config['Instruments'][devkey]['GUI_label'] = dict()
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = dict()
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = dict()
-                        # loop through all selected outputs
-                        for PTCidx in range(len(self.config['Instruments'][devkey]['dev_type'])):
-                            # create GUI elements
-                            self.config['Instruments'][devkey]['GUI_disp'][PTCidx] = QLabel('')
-                            self.config['Instruments'][devkey]['GUI_label'][PTCidx] = QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'][PTCidx])
-                            self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx] = QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'][PTCidx])
-                            self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx].toggled.connect(self.clicked_save)
-                            self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx] = QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'][PTCidx])
-                            self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx].clicked.connect(self.clicked_plot)
-                            # add GUI elements to group
-                            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
-                            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 0)
-                            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 1)
-                            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 3)
-                            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 4)
 
-                    ###############################################################
-                    # Alicat
-                    ###############################################################
-                    elif dev_driver == 'Alicat':
-                        if f_debug:
-                            print(' ... adding Alicat device ...')
- 
-                        # create the device thread
-                        self.config['Instruments'][devkey]['GUI_thread'] = devices.dev_Alicat.driver_Alicat(
-                            self.config['Instruments'][devkey]
-                            )
-                        # start device thread
-                        self.config['Instruments'][devkey]['GUI_thread'].start()
-                        # wait for Thread to finish device initialization
-                        while(self.config['Instruments'][devkey]['GUI_thread'].ready !=1):
-                            time.sleep(1)
-                        # add empty dicts during first call
-                        self.config['Instruments'][devkey]['GUI_flow_edit'] = dict()
-                        self.config['Instruments'][devkey]['GUI_disp'] = dict()
-                        self.config['Instruments'][devkey]['GUI_savecheck'] = dict()
-                        self.config['Instruments'][devkey]['GUI_plotcheck'] = dict()
-                        self.config['Instruments'][devkey]['GUI_setP'] = dict()
-                        self.config['Instruments'][devkey]['GUI_setG'] = dict()
-                        self.config['Instruments'][devkey]['GUI_gas_edit'] = dict()
-                        self.config['Instruments'][devkey]['GUI_label'] = dict()
-                        self.config['Instruments'][devkey]['GUI_unit'] = dict()
-                        # loop through all devices on the bus
-                        for Alicatidx in range(len(self.config['Instruments'][devkey]['dev_id'])):
-                            if not 'elements_Alicat' in self.config['GUI_groups'][groupname]:
-                                self.config['GUI_groups'][groupname]['elements_Alicat'] = -1;
-                                self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1;
-
-                            self.config['GUI_groups'][groupname]['elements_Alicat'] = self.config['GUI_groups'][groupname]['elements_Alicat'] + 1;
-                            tmpnum = self.config['GUI_groups'][groupname]['elements_Alicat']
-                            self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx]=QSpinBox()
-                            self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setRange(0,500)
-                            self.config['Instruments'][devkey]['GUI_disp'][Alicatidx]=QLabel('')
-                            self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx]=QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
-                            self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx].toggled.connect(self.clicked_save)
-                            self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx]=QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
-                            self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx].clicked.connect(self.clicked_plot)
-                            self.config['Instruments'][devkey]['GUI_setP'][Alicatidx]=0
-                            self.config['Instruments'][devkey]['GUI_setG'][Alicatidx]=0
-                            self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx]=QComboBox()
-                            self.config['Instruments'][devkey]['GUI_label'][Alicatidx]=QLabel('%s:' % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
-                            # get initial device reading to populate initial GUI elements
-                            # if this is not done, the device will be reset to a standard config 
-                            # (to whatever the default value of the GUI elements is)
-                            # and not keep its current set values (setpopint and gas type)
-                            for gas in self.config['Instruments'][devkey]['GUI_thread'].gases: 
-                                self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx].addItem(gas)
-                            self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setValue(int(self.config['Instruments'][devkey]['GUI_thread'].setP[Alicatidx]*10))
-                            self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].setG[Alicatidx]))
-                            if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 1: # flow controller
-                                self.config['Instruments'][devkey]['GUI_unit'][Alicatidx]=QLabel('sccm*10')
-                            elif self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 2: # flow meter
-                                self.config['Instruments'][devkey]['GUI_unit'][Alicatidx]=QLabel('sccm*10')
-                            # check if this is the first Alicat device and if create all subgroups
-                            if self.config['GUI_groups'][groupname]['elements_Alicat'] == 0:
-                                # setpoint group
-                                self.config['GUI_groups'][groupname]['Groupbox_setpoint'] = QGroupBox('set point')
-                                self.config['GUI_groups'][groupname]['layout_setpoint'] = QGridLayout()
-                                self.config['GUI_groups'][groupname]['Groupbox_setpoint'].setLayout(self.config['GUI_groups'][groupname]['layout_setpoint'])
-                                # setpoint group
-                                self.config['GUI_groups'][groupname]['Groupbox_gastype'] = QGroupBox('gas type')
-                                self.config['GUI_groups'][groupname]['layout_gastype'] = QGridLayout()
-                                self.config['GUI_groups'][groupname]['Groupbox_gastype'].setLayout(self.config['GUI_groups'][groupname]['layout_gastype'])
-                                # flowrate group
-                                self.config['GUI_groups'][groupname]['Groupbox_flowrate'] = QGroupBox('flow rate')
-                                self.config['GUI_groups'][groupname]['layout_flowrate'] = QGridLayout()
-                                self.config['GUI_groups'][groupname]['Groupbox_flowrate'].setLayout(self.config['GUI_groups'][groupname]['layout_flowrate'])
-                                # add groups to main device groupbox
-                                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_setpoint'],self.config['GUI_groups'][groupname]['elements'],0)       
-                                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_gastype'],self.config['GUI_groups'][groupname]['elements'],1)
-                                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_flowrate'],self.config['GUI_groups'][groupname]['elements'],2)
-                            # now add all Alicat speficic GUI elements
-                            # for setpoint
-                            if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 1: # flow controller
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_label'][Alicatidx], tmpnum, 0)
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx], tmpnum, 1)
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_unit'][Alicatidx], tmpnum, 2)
-                            if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 2: # flow meter
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_label'][Alicatidx], tmpnum, 0)
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx], tmpnum, 1)
-                                self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_unit'][Alicatidx], tmpnum, 2)
-                                self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setEnabled(False)
-                            # for gas type
-                            self.config['GUI_groups'][groupname]['layout_gastype'].addWidget(self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx], tmpnum, 0)
-                            # for readout
-                            self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][Alicatidx], tmpnum, 0)
-                            self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx], tmpnum, 1)
-                            self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx], tmpnum, 2)
+    def configured_ports(self):
+        # ports of all configured instruments, enabled or not, never probed
+        # by discovery (non-SCPI lines, lines used by other programs)
+        ports = []
+        for devidx, devkey in enumerate(list(self.config['Instruments'].keys())):
+            if 'dev_interface' in self.config['Instruments'][devkey]:
+                port = devices.driver_base.visa_port(self.config['Instruments'][devkey])
+            elif 'dev_port' in self.config['Instruments'][devkey]:
+                port = self.config['Instruments'][devkey]['dev_port']
+            else:
+                continue
+            if isinstance(port, str):
+                ports.append(port)
+        return ports
 
 
+    def add_device(self, devkey, groupname):
+        dev_driver = self.config['Instruments'][devkey]['dev_driver']
 
-        # add about section
-        self.MainLayout.addWidget(QLabel(str_about), maxrow, 0, 1, 2)
-        self.statuslabel = QLabel('no Error')
-        self.MainLayout.addWidget(self.statuslabel, maxrow, 2, 1, 1)
+        ###############################################################
+        # Instrument specific GUI elements etc
+        ###############################################################
 
-        timer = QTimer(self)
-        timer.timeout.connect(self.update_controls)
-        timer.start(500)
-        self.show()
+        ###############################################################
+        # K2100
+        ###############################################################
+        if dev_driver == 'K2100':
+            if f_debug:
+                print(' ... adding K2100 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
+            for mode in self.config['Instruments'][devkey]['GUI_thread'].modes: 
+                self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
+            self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
+                self.config['Instruments'][devkey]['dev_type']
+                )))
+            self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 4)
+
+        ###############################################################
+        # K2000
+        ###############################################################
+        elif dev_driver == 'K2000':
+            if f_debug:
+                print(' ... adding K2000 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
+            for mode in self.config['Instruments'][devkey]['GUI_thread'].modes: 
+                self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
+            self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
+                self.config['Instruments'][devkey]['dev_type']
+                )))
+            self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)                        
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 4)
+
+        ###############################################################
+        # K2182A
+        ###############################################################
+        elif dev_driver == 'K2182A':
+            if f_debug:
+                print(' ... adding K2182A device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+
+        ###############################################################
+        # K2400
+        ###############################################################
+        elif dev_driver == 'K2400':
+            if f_debug:
+                print(' ... adding K2400 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            self.config['Instruments'][devkey]['GUI_mode'] = {0:QComboBox()}
+            for mode in self.config['Instruments'][devkey]['GUI_thread'].modes:
+                self.config['Instruments'][devkey]['GUI_mode'][0].addItem(mode)
+            self.config['Instruments'][devkey]['GUI_mode'][0].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].modes.index(
+                self.config['Instruments'][devkey]['dev_type']
+                )))
+            self.config['Instruments'][devkey]['GUI_mode'][0].currentIndexChanged.connect(self.switch_mode)
+            self.config['Instruments'][devkey]['GUI_setP_edit']={0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_setP_edit'][0].setValidator(QDoubleValidator(-5.00,+5.00,9))
+            self.config['Instruments'][devkey]['GUI_setP_edit'][0].setText('0.0')
+            # does not work
+            #self.config['Instruments'][devkey]['GUI_setP_edit'][0].editingFinished.connect(self.changed_setP)
+            # does not work
+            #self.config['Instruments'][devkey]['GUI_setP_edit'][0].returnPressed.connect(self.changed_setP)
+            self.config['Instruments'][devkey]['GUI_setP_edit'][0].textEdited.connect(self.changed_setP)
+            self.config['Instruments'][devkey]['GUI_compl_edit']={0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_compl_edit'][0].setValidator(QDoubleValidator(0.00,42,9))
+            self.config['Instruments'][devkey]['GUI_compl_edit'][0].setText(str(self.config['Instruments'][devkey]['dev_compliance']))
+            # does not work
+            #self.config['Instruments'][devkey]['GUI_compl_edit'][0].editingFinished.connect(self.changed_compl)
+            # does not work
+            #self.config['Instruments'][devkey]['GUI_compl_edit'][0].returnPressed.connect(self.changed_compl)
+            self.config['Instruments'][devkey]['GUI_compl_edit'][0].textEdited.connect(self.changed_compl)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_setP_edit'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_mode'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(QLabel('Compliance'), self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_compl_edit'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            # sweep parameters
+            self.config['Instruments'][devkey]['GUI_sweep_mode'] = {0:QComboBox()}
+            for sweep in self.config['Instruments'][devkey]['GUI_thread'].sweeps:
+                self.config['Instruments'][devkey]['GUI_sweep_mode'][0].addItem(sweep)
+            self.config['Instruments'][devkey]['GUI_sweep_start'] = {0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_sweep_start'][0].setValidator(QDoubleValidator(-210,+210,9))
+            self.config['Instruments'][devkey]['GUI_sweep_start'][0].setText('0.0')
+            self.config['Instruments'][devkey]['GUI_sweep_start'][0].setToolTip('sweep start')
+            self.config['Instruments'][devkey]['GUI_sweep_stop'] = {0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_sweep_stop'][0].setValidator(QDoubleValidator(-210,+210,9))
+            self.config['Instruments'][devkey]['GUI_sweep_stop'][0].setText('1.0')
+            self.config['Instruments'][devkey]['GUI_sweep_stop'][0].setToolTip('sweep stop')
+            self.config['Instruments'][devkey]['GUI_sweep_points'] = {0:QSpinBox()}
+            self.config['Instruments'][devkey]['GUI_sweep_points'][0].setRange(2,2500)
+            self.config['Instruments'][devkey]['GUI_sweep_points'][0].setValue(11)
+            self.config['Instruments'][devkey]['GUI_sweep_points'][0].setToolTip('sweep points')
+            self.config['Instruments'][devkey]['GUI_sweep_delay'] = {0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_sweep_delay'][0].setValidator(QDoubleValidator(0.0,9999,3))
+            self.config['Instruments'][devkey]['GUI_sweep_delay'][0].setText('0.0')
+            self.config['Instruments'][devkey]['GUI_sweep_delay'][0].setToolTip('source delay per point in sec')
+            self.config['Instruments'][devkey]['GUI_sweep_list'] = {0:QLineEdit()}
+            self.config['Instruments'][devkey]['GUI_sweep_list'][0].setPlaceholderText('LIST values: v1,v2,...')
+            self.config['Instruments'][devkey]['GUI_sweep_button'] = {0:QPushButton("sweep %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_sweep_button'][0].clicked.connect(self.clicked_sweep)
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(QLabel('Sweep'), self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_mode'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_start'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_stop'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_points'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_delay'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_button'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_sweep_list'][0], self.config['GUI_groups'][groupname]['elements'], 1, 1, 3)
+
+        ###############################################################
+        # Newport69931
+        ###############################################################
+        elif dev_driver == 'Newport69931':
+            if f_debug:
+                print(' ... adding Newport69931 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
+            self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
+            if self.config['Instruments'][devkey]['GUI_thread'].state:
+                self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
+            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+
+        ###############################################################
+        # Newport68945
+        ###############################################################
+        elif dev_driver == 'Newport68945':
+            if f_debug:
+                print(' ... adding Newport69931 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
+            self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
+            if self.config['Instruments'][devkey]['GUI_thread'].state:
+                self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
+            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+
+        ###############################################################
+        # LambdaSC
+        ###############################################################
+        elif dev_driver == 'LambdaSC':
+            if f_debug:
+                print(' ... adding LambdaSC device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')} # only for error checking
+            self.config['Instruments'][devkey]['GUI_onoffcheck'] = {0:QCheckBox("turn on %s" % self.config['Instruments'][devkey]['dev_label'])}
+            if self.config['Instruments'][devkey]['GUI_thread'].state:
+                self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggle()
+            self.config['Instruments'][devkey]['GUI_onoffcheck'][0].toggled.connect(self.clicked_onoff)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_onoffcheck'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+
+        ###############################################################
+        # RHUSB
+        ###############################################################
+        elif dev_driver == 'RHUSB':
+            if f_debug:
+                print(' ... adding RHUSB device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+
+        ###############################################################
+        # SPERSCI80005
+        ###############################################################
+        elif dev_driver == 'SPERSCI80005':
+            if f_debug:
+                print(' ... adding SPERSCI80005 device ...')
+            # create GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = {0:QLabel('')}
+            self.config['Instruments'][devkey]['GUI_label'] = {0:QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'] = {0:QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_savecheck'][0].toggled.connect(self.clicked_save)
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = {0:QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'])}
+            self.config['Instruments'][devkey]['GUI_plotcheck'][0].clicked.connect(self.clicked_plot)
+            # add GUI elements to group
+            self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][0], self.config['GUI_groups'][groupname]['elements'], 0)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][0], self.config['GUI_groups'][groupname]['elements'], 1)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][0], self.config['GUI_groups'][groupname]['elements'], 2)
+            self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][0], self.config['GUI_groups'][groupname]['elements'], 3)
+
+        ###############################################################
+        # PTC10
+        ###############################################################
+        elif dev_driver == 'PTC10':
+            if f_debug:
+                print(' ... adding PTC10 device ...')
+            # add empty dicts for GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = dict()
+            self.config['Instruments'][devkey]['GUI_label'] = dict()
+            self.config['Instruments'][devkey]['GUI_savecheck'] = dict()
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = dict()
+            # loop through all selected outputs
+            for PTCidx in range(len(self.config['Instruments'][devkey]['dev_type'])):
+                # create GUI elements
+                self.config['Instruments'][devkey]['GUI_disp'][PTCidx] = QLabel('')
+                self.config['Instruments'][devkey]['GUI_label'][PTCidx] = QLabel(('%s:') % self.config['Instruments'][devkey]['dev_label'][PTCidx])
+                self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx] = QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'][PTCidx])
+                self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx].toggled.connect(self.clicked_save)
+                self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx] = QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'][PTCidx])
+                self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx].clicked.connect(self.clicked_plot)
+                # add GUI elements to group
+                self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 0)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 1)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 3)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][PTCidx], self.config['GUI_groups'][groupname]['elements'], 4)
+
+        ###############################################################
+        # Replay
+        ###############################################################
+        elif dev_driver == 'Replay':
+            if f_debug:
+                print(' ... adding Replay device ...')
+            # add empty dicts for GUI elements
+            self.config['Instruments'][devkey]['GUI_disp'] = dict()
+            self.config['Instruments'][devkey]['GUI_label'] = dict()
+            self.config['Instruments'][devkey]['GUI_savecheck'] = dict()
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = dict()
+            # one row per replayed file
+            for Replayidx in range(len(self.config['Instruments'][devkey]['GUI_thread'].filenames)):
+                Replaylabel = self.config['Instruments'][devkey]['GUI_thread'].label(Replayidx)
+                # create GUI elements
+                self.config['Instruments'][devkey]['GUI_disp'][Replayidx] = QLabel('')
+                self.config['Instruments'][devkey]['GUI_label'][Replayidx] = QLabel(('%s:') % Replaylabel)
+                self.config['Instruments'][devkey]['GUI_savecheck'][Replayidx] = QCheckBox("save %s" % Replaylabel)
+                self.config['Instruments'][devkey]['GUI_savecheck'][Replayidx].toggled.connect(self.clicked_save)
+                self.config['Instruments'][devkey]['GUI_plotcheck'][Replayidx] = QPushButton("plot %s" % Replaylabel)
+                self.config['Instruments'][devkey]['GUI_plotcheck'][Replayidx].clicked.connect(self.clicked_plot)
+                # add GUI elements to group
+                self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_label'][Replayidx], self.config['GUI_groups'][groupname]['elements'], 0)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][Replayidx], self.config['GUI_groups'][groupname]['elements'], 1)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][Replayidx], self.config['GUI_groups'][groupname]['elements'], 2)
+                self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][Replayidx], self.config['GUI_groups'][groupname]['elements'], 3)
+
+        ###############################################################
+        # Alicat
+        ###############################################################
+        elif dev_driver == 'Alicat':
+            if f_debug:
+                print(' ... adding Alicat device ...')
+ 
+            # add empty dicts during first call
+            self.config['Instruments'][devkey]['GUI_flow_edit'] = dict()
+            self.config['Instruments'][devkey]['GUI_disp'] = dict()
+            self.config['Instruments'][devkey]['GUI_savecheck'] = dict()
+            self.config['Instruments'][devkey]['GUI_plotcheck'] = dict()
+            self.config['Instruments'][devkey]['GUI_setP'] = dict()
+            self.config['Instruments'][devkey]['GUI_setG'] = dict()
+            self.config['Instruments'][devkey]['GUI_gas_edit'] = dict()
+            self.config['Instruments'][devkey]['GUI_label'] = dict()
+            self.config['Instruments'][devkey]['GUI_unit'] = dict()
+            # loop through all devices on the bus
+            for Alicatidx in range(len(self.config['Instruments'][devkey]['dev_id'])):
+                if not 'elements_Alicat' in self.config['GUI_groups'][groupname]:
+                    self.config['GUI_groups'][groupname]['elements_Alicat'] = -1;
+                    self.config['GUI_groups'][groupname]['elements'] = self.config['GUI_groups'][groupname]['elements'] + 1;
+
+                self.config['GUI_groups'][groupname]['elements_Alicat'] = self.config['GUI_groups'][groupname]['elements_Alicat'] + 1;
+                tmpnum = self.config['GUI_groups'][groupname]['elements_Alicat']
+                self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx]=QSpinBox()
+                self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setRange(0,500)
+                self.config['Instruments'][devkey]['GUI_disp'][Alicatidx]=QLabel('')
+                self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx]=QCheckBox("save %s" % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
+                self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx].toggled.connect(self.clicked_save)
+                self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx]=QPushButton("plot %s" % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
+                self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx].clicked.connect(self.clicked_plot)
+                self.config['Instruments'][devkey]['GUI_setP'][Alicatidx]=0
+                self.config['Instruments'][devkey]['GUI_setG'][Alicatidx]=0
+                self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx]=QComboBox()
+                self.config['Instruments'][devkey]['GUI_label'][Alicatidx]=QLabel('%s:' % self.config['Instruments'][devkey]['dev_label'][Alicatidx])
+                # get initial device reading to populate initial GUI elements
+                # if this is not done, the device will be reset to a standard config 
+                # (to whatever the default value of the GUI elements is)
+                # and not keep its current set values (setpopint and gas type)
+                for gas in self.config['Instruments'][devkey]['GUI_thread'].gases: 
+                    self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx].addItem(gas)
+                self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setValue(int(self.config['Instruments'][devkey]['GUI_thread'].setP[Alicatidx]*10))
+                self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx].setCurrentIndex(int(self.config['Instruments'][devkey]['GUI_thread'].setG[Alicatidx]))
+                if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 1: # flow controller
+                    self.config['Instruments'][devkey]['GUI_unit'][Alicatidx]=QLabel('sccm*10')
+                elif self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 2: # flow meter
+                    self.config['Instruments'][devkey]['GUI_unit'][Alicatidx]=QLabel('sccm*10')
+                # check if this is the first Alicat device and if create all subgroups
+                if self.config['GUI_groups'][groupname]['elements_Alicat'] == 0:
+                    # setpoint group
+                    self.config['GUI_groups'][groupname]['Groupbox_setpoint'] = QGroupBox('set point')
+                    self.config['GUI_groups'][groupname]['layout_setpoint'] = QGridLayout()
+                    self.config['GUI_groups'][groupname]['Groupbox_setpoint'].setLayout(self.config['GUI_groups'][groupname]['layout_setpoint'])
+                    # setpoint group
+                    self.config['GUI_groups'][groupname]['Groupbox_gastype'] = QGroupBox('gas type')
+                    self.config['GUI_groups'][groupname]['layout_gastype'] = QGridLayout()
+                    self.config['GUI_groups'][groupname]['Groupbox_gastype'].setLayout(self.config['GUI_groups'][groupname]['layout_gastype'])
+                    # flowrate group
+                    self.config['GUI_groups'][groupname]['Groupbox_flowrate'] = QGroupBox('flow rate')
+                    self.config['GUI_groups'][groupname]['layout_flowrate'] = QGridLayout()
+                    self.config['GUI_groups'][groupname]['Groupbox_flowrate'].setLayout(self.config['GUI_groups'][groupname]['layout_flowrate'])
+                    # add groups to main device groupbox
+                    self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_setpoint'],self.config['GUI_groups'][groupname]['elements'],0)       
+                    self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_gastype'],self.config['GUI_groups'][groupname]['elements'],1)
+                    self.config['GUI_groups'][groupname]['layout'].addWidget(self.config['GUI_groups'][groupname]['Groupbox_flowrate'],self.config['GUI_groups'][groupname]['elements'],2)
+                # now add all Alicat speficic GUI elements
+                # for setpoint
+                if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 1: # flow controller
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_label'][Alicatidx], tmpnum, 0)
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx], tmpnum, 1)
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_unit'][Alicatidx], tmpnum, 2)
+                if self.config['Instruments'][devkey]['dev_type'][Alicatidx] == 2: # flow meter
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_label'][Alicatidx], tmpnum, 0)
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx], tmpnum, 1)
+                    self.config['GUI_groups'][groupname]['layout_setpoint'].addWidget(self.config['Instruments'][devkey]['GUI_unit'][Alicatidx], tmpnum, 2)
+                    self.config['Instruments'][devkey]['GUI_flow_edit'][Alicatidx].setEnabled(False)
+                # for gas type
+                self.config['GUI_groups'][groupname]['layout_gastype'].addWidget(self.config['Instruments'][devkey]['GUI_gas_edit'][Alicatidx], tmpnum, 0)
+                # for readout
+                self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_disp'][Alicatidx], tmpnum, 0)
+                self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_savecheck'][Alicatidx], tmpnum, 1)
+                self.config['GUI_groups'][groupname]['layout_flowrate'].addWidget(self.config['Instruments'][devkey]['GUI_plotcheck'][Alicatidx], tmpnum, 2)
 
 
     def clicked_save(self):
@@ -618,6 +757,7 @@ class EZlab(QMainWindow):
                                         print('Saving '+self.config['Instruments'][devkey]['dev_label'] +' to ' + filename)                                            
                             else:
                                 self.config['Instruments'][devkey]['GUI_thread'].save[subdevidx] = False
+                                storage.writer.get().close(self.config['Instruments'][devkey]['GUI_thread'].savefilename[subdevidx])
                                 print(' ... '+subbtn.text()+' is deselected')
 
 
@@ -650,11 +790,54 @@ class EZlab(QMainWindow):
                                 else:
                                     self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx]=plot_widget(self.config['Instruments'][devkey]['dev_label']+' vs. time plot',self.config['Instruments'][devkey]['dev_label'])
                                 self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].show()
+                                # every sample from now on, with its read time
+                                if 'GUI_plotring' not in self.config['Instruments'][devkey]:
+                                    self.config['Instruments'][devkey]['GUI_plotring'] = dict()
+                                self.config['Instruments'][devkey]['GUI_plotring'][subdevidx] = self.config['Instruments'][devkey]['GUI_thread'].subscribe(subdevidx)
                             else:
                                 self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].show()
                             return
 
 
+    def clicked_sweep(self):
+        for devidx, devkey in enumerate(list(self.config['Instruments'].keys())):
+            if self.config['Instruments'][devkey]['dev_enable']:
+                if 'GUI_sweep_button' in self.config['Instruments'][devkey]:
+                    btn = self.config['Instruments'][devkey]['GUI_sweep_button']
+                    for subdevidx, subbtn in btn.items():
+                        if subbtn == self.sender():
+                            request = dict()
+                            request['spacing'] = self.config['Instruments'][devkey]['GUI_sweep_mode'][subdevidx].currentText()
+                            try:
+                                request['delay'] = float(self.config['Instruments'][devkey]['GUI_sweep_delay'][subdevidx].text() or 0.0)
+                                if request['spacing'] == 'LIST':
+                                    request['values'] = [float(i) for i in self.config['Instruments'][devkey]['GUI_sweep_list'][subdevidx].text().split(',') if i.strip() != '']
+                                    if len(request['values']) == 0:
+                                        raise ValueError('empty list')
+                                else:
+                                    request['start'] = float(self.config['Instruments'][devkey]['GUI_sweep_start'][subdevidx].text())
+                                    request['stop'] = float(self.config['Instruments'][devkey]['GUI_sweep_stop'][subdevidx].text())
+                                    request['points'] = self.config['Instruments'][devkey]['GUI_sweep_points'][subdevidx].value()
+                                self.config['Instruments'][devkey]['GUI_thread'].check_sweep(**request)
+                            except ValueError as e:
+                                self.statuslabel.setText('-- ERROR -- invalid sweep parameters: %s (%s)' % (self.config['Instruments'][devkey]['dev_label'], str(e)))
+                                return
+                            self.config['Instruments'][devkey]['GUI_thread'].newsweep[subdevidx] = request
+                            # open the I-V plot, it is updated when the sweep arrived
+                            if 'GUI_ivwindow' not in self.config['Instruments'][devkey]:
+                                self.config['Instruments'][devkey]['GUI_ivwindow'] = dict()
+                            if subdevidx not in self.config['Instruments'][devkey]['GUI_ivwindow']:
+                                self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx] = iv_widget(self.config['Instruments'][devkey]['dev_label']+' I-V sweep')
+                            self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx].show()
+                            return
+
+
+    def clicked_scan(self):
+        self.scanbutton.setEnabled(False)
+        self.scanbutton.setText('scanning ...')
+        devices.discovery.refresh(callback=print_instruments, ports=self.configured_ports())
+
+
     def show_savedialog(self, default_name):
         selected_filter = "data file (*.csv)"
         filename = QFileDialog.getSaveFileName(self,"select file to save", default_name,selected_filter)
@@ -700,10 +883,26 @@ class EZlab(QMainWindow):
 
     def update_controls(self):
         # this is the main update function which gets call every few ms
+        # show the result of a finished instrument scan
+        if not devices.discovery.running.is_set() and not self.inittimer.isActive():
+            if not self.scanbutton.isEnabled():
+                self.scanbutton.setText('scan instruments')
+                self.scanbutton.setEnabled(True)
+            if devices.discovery.scanned != self.lastscan:
+                self.lastscan = devices.discovery.scanned
+                self.scanbutton.setToolTip('\n'.join(['%s: %s' % (port, instidn) for port, instidn in devices.discovery.get().items()]))
+        # backlog and throughput of the save files
+        if storage.writer.instance is not None:
+            if storage.session.instance is not None:
+                self.statuslabel.setToolTip('%s\n%s' % (storage.writer.instance.summary(), storage.session.instance.summary()))
+            else:
+                self.statuslabel.setToolTip(storage.writer.instance.summary())
+
         for devidx, devkey in enumerate(list(self.config['Instruments'].keys())):
             if self.config['Instruments'][devkey]['dev_enable']:
                 dev_driver = self.config['Instruments'][devkey]['dev_driver']
-                if dev_driver in devices.available_driver:
+                # skip devices which are still initializing (or failed)
+                if dev_driver in devices.available_driver and 'GUI_thread' in self.config['Instruments'][devkey]:
 
 
                     if isinstance(self.config['Instruments'][devkey]['dev_label'],list):
@@ -720,12 +919,17 @@ class EZlab(QMainWindow):
                             if 'GUI_disp' in self.config['Instruments'][devkey]:
                                 self.config['Instruments'][devkey]['GUI_disp'][subdevidx].setText(
                                     self.config['Instruments'][devkey]['GUI_thread'].dispbuf[subdevidx])
+                                # timing of the driver loop
+                                self.config['Instruments'][devkey]['GUI_disp'][subdevidx].setToolTip(
+                                    self.config['Instruments'][devkey]['GUI_thread'].status())
                             # update plot
                             if 'GUI_plotwindow' in self.config['Instruments'][devkey]:
                                 if subdevidx in self.config['Instruments'][devkey]['GUI_plotwindow']:
-                                    self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].update_plot(
-                                        time.time(), 
-                                        self.config['Instruments'][devkey]['GUI_thread'].plotval[subdevidx])
+                                    # all samples since the last update in one batch
+                                    if len(self.config['Instruments'][devkey]['GUI_plotring'][subdevidx]):
+                                        self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].add_points(
+                                            *self.config['Instruments'][devkey]['GUI_plotring'][subdevidx].get())
+                                        self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].draw_plot()
 
                             ###################################################
                             # Instrument specific GUI elements etc
@@ -747,6 +951,27 @@ class EZlab(QMainWindow):
                                 # set gas types
                                 if (self.config['Instruments'][devkey]['GUI_gas_edit'][subdevidx].currentIndex()!=self.config['Instruments'][devkey]['GUI_setG'][subdevidx]):
                                    self.config['Instruments'][devkey]['GUI_thread'].setGnew[subdevidx] = self.config['Instruments'][devkey]['GUI_gas_edit'][subdevidx].currentIndex()
+                                # sustained bus throughput of this port
+                                self.config['Instruments'][devkey]['GUI_disp'][subdevidx].setToolTip('%s: %.1f frames/s\n%s' % (
+                                    self.config['Instruments'][devkey]['dev_port'],
+                                    self.config['Instruments'][devkey]['GUI_thread'].framerate,
+                                    self.config['Instruments'][devkey]['GUI_thread'].status()))
+
+                            ###################################################
+                            # K2400
+                            ###################################################
+                            if dev_driver == 'K2400':
+                                # show a failed sweep
+                                if self.config['Instruments'][devkey]['GUI_thread'].sweeperror != '':
+                                    self.statuslabel.setText('-- ERROR -- sweep %s: %s' % (self.config['Instruments'][devkey]['dev_label'], self.config['Instruments'][devkey]['GUI_thread'].sweeperror))
+                                    self.config['Instruments'][devkey]['GUI_thread'].sweeperror = ''
+                                # draw a newly arrived sweep
+                                if 'GUI_ivwindow' in self.config['Instruments'][devkey]:
+                                    if subdevidx in self.config['Instruments'][devkey]['GUI_ivwindow']:
+                                        if self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx].sweepcount != self.config['Instruments'][devkey]['GUI_thread'].sweepcount:
+                                            self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx].sweepcount = self.config['Instruments'][devkey]['GUI_thread'].sweepcount
+                                            self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx].update_iv(
+                                                *self.config['Instruments'][devkey]['GUI_thread'].sweepdata)
 
 
     def closeEvent(self, event):
@@ -762,8 +987,34 @@ class EZlab(QMainWindow):
                         if 'GUI_plotwindow' in self.config['Instruments'][devkey]:
                             if subdevidx in self.config['Instruments'][devkey]['GUI_plotwindow']:
                                 self.config['Instruments'][devkey]['GUI_plotwindow'][subdevidx].close()
-                # stop thread
-                self.config['Instruments'][devkey]['GUI_thread'].stop()
+                if 'GUI_ivwindow' in self.config['Instruments'][devkey]:
+                    for subdevidx in self.config['Instruments'][devkey]['GUI_ivwindow']:
+                        self.config['Instruments'][devkey]['GUI_ivwindow'][subdevidx].close()
+                # stop thread, all at once
+                if 'GUI_thread' in self.config['Instruments'][devkey]:
+                    self.config['Instruments'][devkey]['GUI_thread'].request_stop()
+        # wait for all drivers together, at most Tshutdown
+        if hasattr(EZconfig, 'EZlabTshutdown'):
+            Tshutdown = EZconfig.EZlabTshutdown
+        else:
+            Tshutdown = 5.0
+        deadline = time.monotonic()+Tshutdown
+        allstopped = True
+        for devidx, devkey in enumerate(list(self.config['Instruments'].keys())):
+            if 'GUI_thread' in self.config['Instruments'][devkey]:
+                if not self.config['Instruments'][devkey]['GUI_thread'].stop(max(deadline-time.monotonic(), 0.0)):
+                    allstopped = False
+        if self.engine is not None:
+            self.engine.stop()
+        # write the remaining rows and close the save files
+        storage.session.stop()
+        storage.writer.stop()
+        # close the shared ports, a driver still blocked in a transaction
+        # keeps its port (closing it under the running thread may crash)
+        if allstopped:
+            devices.visa_pool.close_all()
+        else:
+            devices.visa_pool.close_released()
 
 
 class plot_widget(QWidget):
@@ -779,37 +1030,58 @@ class plot_widget(QWidget):
         self.setFixedWidth(400)
         self.setFixedHeight(200)
         self.points=1000 #number of data points
-        self.X=[]
-        self.Y=dict() 
+        # preallocated history, times in h since the first point
+        self.history = None
+        self.T0 = None
+        # one curve per series, created on the first draw and then updated
+        self.curves = []
+        self.pens = [pg.mkPen('r', width=2), pg.mkPen('b', width=2)]
+        self.graphWidget.setLabel('left', self.ylabel)
+        self.graphWidget.setLabel('bottom', 'time (h)')
         layout.addWidget(self.graphWidget)
     
 
-    def update_plot(self, newx, newy):
-        self.X = np.append(self.X, newx)
-        for tmpid, tmpval in enumerate(newy):
-            if tmpid in self.Y:
-                self.Y[tmpid] = np.append(self.Y[tmpid], tmpval)
-            else:
-                self.Y[tmpid] = [tmpval]
-
-            if len(self.X) > self.points:
-                self.Y[tmpid] = np.delete(self.Y[tmpid],0)
-                
-        if len(self.X) > self.points:
-            self.X = np.delete(self.X, 0)
-
-        for plotid, plotkey in enumerate(newy):
-            if plotid > 0:
-                self.graphWidget.plot((self.X-self.X[len(self.X)-1])/3600,
-                                      self.Y[plotid],clear=False,
-                                      pen=pg.mkPen('b', width=2))
-            else:
-                self.graphWidget.plot((self.X-self.X[len(self.X)-1])/3600,
-                                      self.Y[plotid],clear=True,
-                                      pen=pg.mkPen('r', width=2))
+    def add_points(self, newx, newy):
+        # newx: times, newy: one row of values per time
+        if self.history is None:
+            self.history = devices.ringbuffer.history_buffer(newy.shape[1], self.points)
+            self.T0 = newx[0]
+        self.history.put_many((newx-self.T0)/3600, newy)
 
-        self.graphWidget.setLabel('left', self.ylabel)
-        self.graphWidget.setLabel('bottom', 'time (h)')
+
+    def draw_plot(self):
+        if self.history is None or len(self.history) == 0:
+            return
+        X, Y = self.history.view()
+        for plotid in range(len(Y)):
+            if plotid >= len(self.curves):
+                self.curves.append(self.graphWidget.plot(pen=self.pens[min(plotid, 1)]))
+            self.curves[plotid].setData(X, Y[plotid])
+            # newest point at 0 h by moving the curve, not the data
+            self.curves[plotid].setPos(-X[-1], 0)
+
+
+class iv_widget(QWidget):
+
+    def __init__(self, mytitle):
+        super().__init__()
+        self.title = mytitle
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        self.graphWidget = pg.PlotWidget()
+        self.setWindowTitle(self.title)
+        self.setFixedWidth(400)
+        self.setFixedHeight(300)
+        self.sweepcount = 0 # last sweep shown
+        self.curve = self.graphWidget.plot(pen=pg.mkPen('r', width=2),
+                                           symbol='o', symbolSize=4)
+        self.graphWidget.setLabel('left', 'current (A)')
+        self.graphWidget.setLabel('bottom', 'voltage (V)')
+        layout.addWidget(self.graphWidget)
+
+
+    def update_iv(self, V, A):
+        self.curve.setData(V, A)
 
 
 if __name__=='__main__':
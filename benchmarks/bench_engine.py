@@ -0,0 +1,125 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# thread per instrument (QThread) against the asyncio engine
+# simulated instruments: poll() blocks Tio s like a serial/GPIB transaction
+# for 10, 50 and 200 instruments polled every Tdriver s it reports
+# - CPU time of the process per second
+# - context switches (voluntary + involuntary) per second, i.e. wake-ups
+# - polls per second and mean wake-up jitter of the loops
+# - threads of the process while running
+# Linux/macOS (resource module)
+# run from the repository root: python -m benchmarks.bench_engine
+
+import os
+import resource
+import threading
+import time
+from PyQt5.QtCore import QCoreApplication
+from devices.driver_base import driver_base
+from devices.engine import engine
+
+Tdriver = 0.2
+Tio = 0.005
+duration = 5.0
+counts = [10, 50, 200]
+workers = 8
+
+
+class driver_sim(driver_base):
+    name = 'sim'
+
+    def __init__(self, config):
+        driver_base.__init__(self, config)
+        self.value = 0.0
+
+
+    def poll(self):
+        time.sleep(Tio)
+        self.value = self.value+1.0
+        self.record(0, time.time(), self.value)
+
+
+    def display(self):
+        self.dispbuf[0] = "%.5E" % self.value
+        self.plotval[0] = [self.value]
+
+
+def simulated(n):
+    config = dict(dev_port='SIM', dev_retry=False, dev_Tretry=0,
+                  dev_Tdriver=Tdriver, dev_overrun='skip',
+                  dev_savefile='sim.csv')
+    return [driver_sim(config) for _ in range(n)]
+
+
+def usage():
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime+ru.ru_stime, ru.ru_nvcsw+ru.ru_nivcsw
+
+
+def measure(drivers, start, stop):
+    start(drivers)
+    # let every loop settle before measuring
+    time.sleep(2*Tdriver)
+    polls = sum([driver.npoll for driver in drivers])
+    cpu, switches = usage()
+    tstart = time.monotonic()
+    time.sleep(duration)
+    if os.path.isdir('/proc/self/task'):
+        # OS threads, including the QThreads
+        threads = len(os.listdir('/proc/self/task'))
+    else:
+        threads = threading.active_count()
+    elapsed = time.monotonic()-tstart
+    cpu2, switches2 = usage()
+    polls = sum([driver.npoll for driver in drivers])-polls
+    stop(drivers)
+    jitter = sum([driver.clock.stats()['jittermean'] for driver in drivers])/len(drivers)
+    return (cpu2-cpu)/elapsed, (switches2-switches)/elapsed, polls/elapsed, jitter, threads
+
+
+def start_threads(drivers):
+    for driver in drivers:
+        driver.start()
+
+
+def stop_threads(drivers):
+    for driver in drivers:
+        driver.runstate = False
+    for driver in drivers:
+        driver.wait()
+
+
+def run(counts):
+    # one table row per model and instrument count
+    results = []
+    acq = engine(workers)
+    acq.start()
+
+    def start_engine(drivers):
+        for driver in drivers:
+            acq.add(driver)
+
+    def stop_engine(drivers):
+        for driver in drivers:
+            driver.runstate = False
+        while any([driver.ready for driver in drivers]):
+            time.sleep(0.01)
+
+    print('period %g s, I/O %g ms per poll, %g s per case, %d engine workers' % (
+        Tdriver, 1000*Tio, duration, workers))
+    print('%-8s %5s %10s %12s %10s %12s %8s' % ('model', 'N', 'CPU %', 'switches/s', 'polls/s', 'jitter ms', 'threads'))
+    for n in counts:
+        for model, start, stop in [('thread', start_threads, stop_threads),
+                                   ('asyncio', start_engine, stop_engine)]:
+            cpu, switches, polls, jitter, threads = measure(simulated(n), start, stop)
+            print('%-8s %5d %10.1f %12.0f %10.1f %12.2f %8d' % (
+                model, n, 100*cpu, switches, polls, 1000*jitter, threads))
+            results.append((model, n, cpu, switches, polls, jitter, threads))
+    acq.stop()
+    return results
+
+
+if __name__=='__main__':
+    app = QCoreApplication([])
+    run(counts)
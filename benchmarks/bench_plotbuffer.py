@@ -0,0 +1,51 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# cost of one plot update against the length of the plot history
+# one update: add a batch of new samples (one GUI tick) and get the arrays
+# to draw
+# - append: np.append of X and Y, cut to the history, x axis recomputed as
+#   (X-X[-1])/3600 (the old plot_widget)
+# - history_buffer: preallocated ring, views of the kept samples
+#   (devices.ringbuffer)
+# run from the repository root: python -m benchmarks.bench_plotbuffer
+
+import time
+import numpy as np
+from devices.ringbuffer import history_buffer
+
+sizes = [1000, 10000, 100000, 1000000]
+batch = 5 # samples per GUI tick
+updates = 200
+
+
+def bench_append(size):
+    X = np.arange(size, dtype=float)
+    Y = np.zeros(size)
+    newx = np.arange(batch, dtype=float)
+    newy = np.zeros(batch)
+    tstart = time.perf_counter()
+    for i in range(updates):
+        X = np.append(X, newx)[-size:]
+        Y = np.append(Y, newy)[-size:]
+        _ = (X-X[len(X)-1])/3600
+    return (time.perf_counter()-tstart)/updates
+
+
+def bench_history(size):
+    history = history_buffer(1, size)
+    history.put_many(np.arange(size, dtype=float), np.zeros((size, 1)))
+    newx = np.arange(batch, dtype=float)
+    newy = np.zeros((batch, 1))
+    tstart = time.perf_counter()
+    for i in range(updates):
+        history.put_many(newx, newy)
+        X, Y = history.view()
+    return (time.perf_counter()-tstart)/updates
+
+
+if __name__ == '__main__':
+    print('%d samples per update, time per update' % batch)
+    for size in sizes:
+        print('history %8d: append %9.1f us, history_buffer %6.1f us' % (
+            size, 1e6*bench_append(size), 1e6*bench_history(size)))
@@ -0,0 +1,51 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# ASCII vs binary (FORM:DATA SREal) replies of the Keithley drivers
+# bytes on the bus and decode time for typical buffer sizes
+# (binary replies need GPIB, the RS-232 rows show what they would save)
+# run from the repository root: python -m benchmarks.bench_scpi_transfer
+
+import time
+import numpy as np
+from devices.scpi_binary import decode_ascii
+
+# effective payload rates in bytes/s
+links = [('RS232 9600', 960), ('RS232 115200', 11520), ('GPIB', 1e6)]
+
+
+def timeit(fn, arg, repeat=20):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        dt = time.perf_counter()-start
+        if best is None or dt < best:
+            best = dt
+    return best
+
+
+def ascii_numpy(text):
+    return np.array(text.strip().split(','), dtype=float)
+
+
+def decode_block(raw):
+    # '#0<data><term>' of little endian 32 bit floats, as pyvisa reads it
+    data = raw[2:]
+    return np.frombuffer(data[:len(data)//4*4], dtype='<f4')
+
+
+if __name__=='__main__':
+    rng = np.random.default_rng(0)
+    for points in [1, 100, 1024, 100000]:
+        values = rng.normal(0, 1, points).astype('<f4')
+        text = ','.join('%+.7E' % v for v in values)+'\n'
+        block = b'#0'+values.tobytes()+b'\n'
+        assert np.allclose(decode_block(block), decode_ascii(text), rtol=1e-6)
+        print('%d readings' % points)
+        print('  bytes      ASCII %9d  binary %9d' % (len(text), len(block)))
+        for name, rate in links:
+            print('  %-13s ASCII %9.4f s  binary %9.4f s' % (name, len(text)/rate, len(block)/rate))
+        print('  decode     float() %9.2f us  numpy ASCII %9.2f us  np.frombuffer %9.2f us' % (
+              1e6*timeit(decode_ascii, text), 1e6*timeit(ascii_numpy, text),
+              1e6*timeit(decode_block, block)))
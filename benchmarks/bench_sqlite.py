@@ -0,0 +1,68 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# sustained insert rate of the SQLite sink (storage.sqlstore)
+# the writer thread hands one batch per flush (Tflush = 1 s) to the sink,
+# simulated: channels instruments with 2 values at rate Hz, for each case
+# - batches/s and rows/s the sink sustains (x: headroom over real time)
+# - time range (last 60 s) and last-N queries on the growing database
+#   while it is written (WAL)
+# run from the repository root: python -m benchmarks.bench_sqlite
+
+import os
+import tempfile
+import threading
+import time
+from storage import sqlstore
+
+duration = 3.0
+# (instruments, readings per s each)
+cases = [(10, 10), (50, 10), (10, 1000)]
+layout = [('time', 's', 'f'), ('voltage', 'V', 'f'), ('current', 'A', 'f')]
+
+
+def bench(channels, rate):
+    filename = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    sinks = [sqlstore.sqlite_sink(filename, layout, 'dev%d' % idx) for idx in range(channels)]
+    tsim = 0.0
+    rows = 0
+    batches = 0
+    queries = []
+    stop = threading.Event()
+
+    def query():
+        reader = sqlstore.sqlite_reader(filename)
+        while not stop.is_set():
+            tstart = time.perf_counter()
+            reader.range(('dev0', 'voltage'), tsim-60.0, tsim)
+            reader.last(('dev0', 'voltage'), 100)
+            queries.append(time.perf_counter()-tstart)
+            stop.wait(0.05)
+        reader.close()
+
+    reader = threading.Thread(target=query)
+    reader.start()
+    tstart = time.perf_counter()
+    while time.perf_counter()-tstart < duration:
+        # one writer flush: 1 s of readings of every instrument
+        for sink in sinks:
+            batch = [(tsim+i/rate, 1.0, 1e-3) for i in range(rate)]
+            sink.write(batch)
+            rows += len(batch)
+            batches += 1
+        tsim += 1.0
+    elapsed = time.perf_counter()-tstart
+    stop.set()
+    reader.join()
+    for sink in sinks:
+        sink.close()
+    needed = channels*rate
+    print('%4d x %4d Hz: %8.0f rows/s (%6.1f x real time), %6.0f batches/s, query %.2f ms' % (
+        channels, rate, rows/elapsed, rows/elapsed/needed, batches/elapsed,
+        1000*sum(queries)/max(len(queries), 1)))
+
+
+if __name__ == '__main__':
+    print('SQLite %s, WAL, one transaction per batch' % sqlstore.sqlite3.sqlite_version)
+    for channels, rate in cases:
+        bench(channels, rate)
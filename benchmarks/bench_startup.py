@@ -0,0 +1,65 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# cold start of the driver package, each case in a fresh interpreter
+# - eager: old behaviour, list_resources() and every driver imported
+# - all drivers: every driver imported, no list_resources()
+# - lazy: only the drivers of the enabled instruments in config.config
+# run from the repository root: python -m benchmarks.bench_startup
+
+import os
+import statistics
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+repeat = 5
+
+eager = """
+import time
+start = time.perf_counter()
+import devices
+import devices.visa_pool
+devices.visa_pool.resource_manager().list_resources()
+for name in devices.available_driver:
+    devices.load_driver(name)
+print(time.perf_counter()-start)
+"""
+
+alldriver = """
+import time
+start = time.perf_counter()
+import devices
+for name in devices.available_driver:
+    devices.load_driver(name)
+print(time.perf_counter()-start)
+"""
+
+lazy = """
+import time
+start = time.perf_counter()
+import devices
+import config.config as EZconfig
+for instrument in EZconfig.Instruments.values():
+    if instrument.get('dev_enable', False):
+        devices.load_driver(instrument['dev_driver'])
+print(time.perf_counter()-start)
+"""
+
+
+def coldstart(code):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=root,
+                             capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.split()[-1]))
+    return statistics.median(times)
+
+
+if __name__=='__main__':
+    t_eager = coldstart(eager)
+    t_all = coldstart(alldriver)
+    t_lazy = coldstart(lazy)
+    print('eager (all drivers + list_resources): %.1f ms' % (1000*t_eager))
+    print('all drivers, no list_resources:       %.1f ms' % (1000*t_all))
+    print('lazy (enabled drivers only):          %.1f ms' % (1000*t_lazy))
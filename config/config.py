@@ -3,6 +3,23 @@
 
 EZlabtitle = 'Gas flow control widget'
 
+# driver loops: 'thread' (one thread per instrument) or 'asyncio' (one event
+# loop for all, instrument I/O on EZlabworkers threads)
+EZlabengine = 'thread'
+EZlabworkers = 4
+# max time in s to wait for all drivers on exit
+EZlabTshutdown = 5.0
+# session file of all channels (<EZlabsession>_<date>_<time>.ezb), '' for
+# none, values are written in time order once they are EZlabTreorder s old
+# (at least, the window grows with the delivery latency of the drivers)
+# EZlabsessionformat: 'ezb' (binary) or 'db' (SQLite, queryable while running)
+EZlabsession = ''
+EZlabsessionformat = 'ezb'
+EZlabTreorder = 10.0
+# rollup files of every save file (<file>_1s.csv, ...) with min/max/mean per
+# bucket, bucket lengths in s ([] for none)
+EZlabrollup = [1.0, 60.0, 3600.0]
+
 # Definitions of active instruments
 # Set enable to false if not in use
 Instruments = dict()
@@ -18,7 +35,8 @@ Instruments['Gas Flow::0::0::1::3::Stanford'] = dict(
              dev_label=['In','Out'],
              dev_savefile=['In_gasflow.csv','Out_gasflow.csv'],
              dev_retry = True,
-             dev_Tretry = 5
+             dev_Tretry = 5,
+             dev_Tquery = 0.5 # reply deadline per query in sec
              )
 
 Instruments['Multimeter::1::0::1::2::dev1'] = dict(
@@ -29,9 +47,11 @@ Instruments['Multimeter::1::0::1::2::dev1'] = dict(
              dev_id='KEITHLEY INSTRUMENTS INC.,MODEL 2100,1,01.08-01-01',
              dev_type='V DC',
              dev_label='Cell',
-             dev_savefile='CellVoltage.csv',
+             dev_savefile='CellVoltage.csv', # .ezb: binary, .db: SQLite
              dev_retry = True,
-             dev_Tretry = 5
+             dev_Tretry = 5,
+             dev_burst = 0, # readings per READ? (0: off)
+             dev_rate = 10 # reading rate in Hz for the burst mode
              )
 
 Instruments['Multimeter::1::0::1::2::dev2'] = dict(
@@ -71,7 +91,10 @@ Instruments['Multimeter::1::0::1::2::dev4'] = dict(
              dev_label='Misc',
              dev_savefile='MiscVoltage.csv',
              dev_retry = True,
-             dev_Tretry = 5
+             dev_Tretry = 5,
+             dev_buffer = 0, # readings per buffered acquisition (0: off, max 1024)
+             dev_rate = 10, # reading rate in Hz for the buffered mode
+             dev_binary = False # binary replies (K2000, K2182A, K2400, GPIB only)
          )
 
 Instruments['Multimeter::1::0::1::2::dev5'] = dict(
@@ -102,7 +125,8 @@ Instruments['Multimeter::1::0::1::2::dev6'] = dict(
              dev_savefile='Source.csv',
              dev_retry = True,
              dev_Tretry = 5,
-             dev_term = 'REAR' # 'FRONT' or 'REAR'
+             dev_term = 'REAR', # 'FRONT' or 'REAR'
+             dev_sweepfile = 'Sweep.csv' # I-V sweeps are appended here ('' to disable)
          )
 
 Instruments['Gas Flow::0::0::1::3::dev1'] = dict(
@@ -137,7 +161,8 @@ Instruments['Lamp::1::2::1::1::dev1'] = dict(
              dev_baudrate=9600,
              dev_label='Xenon lamp',
              dev_Tblock = 60*60, # time before the lamp status can be changed again
-             dev_Tdriver = 1
+             dev_Tdriver = 1,
+             dev_overrun = 'skip' # 'skip' or 'catchup' loop cycles missed by a slow query
          )
 
 Instruments['Lamp::1::2::1::1::dev2'] = dict(
@@ -186,3 +211,16 @@ Instruments['Temperature::4::0::1::2::dev2'] = dict(
              dev_savefile='Temp.csv',
              dev_Tdriver = 1
          )
+
+# replay of recorded save files, e.g. to test plots and saving without hardware
+Instruments['Replay::5::0::1::2::dev1'] = dict(
+             dev_enable=False,
+             dev_driver='Replay',
+             dev_interface='file',
+             dev_port=['CellVoltage.csv', 'RTD.csv'], # recorded files
+             dev_layout='K2100', # driver which wrote the files
+             dev_speed=100, # 1: real time, 0: as fast as possible
+             dev_label=['Cell replay', 'RTD replay'],
+             dev_savefile=['CellReplay.csv', 'RTDReplay.csv'],
+             dev_loop=True
+         )
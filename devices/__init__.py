@@ -3,18 +3,19 @@
 
 import os
 import importlib
-import pyvisa
-
-rm = pyvisa.ResourceManager()
-available_instr = rm.list_resources()
-del rm
 
 available_driver = []
 
-for module in os.listdir(os.path.dirname(__file__)):
-    if module == '__init__.py' or module[-3:] != '.py':
+# list the drivers without importing them
+for module in sorted(os.listdir(os.path.dirname(__file__))):
+    # only dev_*.py are drivers, everything else are shared helpers
+    if module[:4] != 'dev_' or module[-3:] != '.py':
         continue
     available_driver.append(module[4:-3])
-    importlib.import_module('.%s' % module[:-3], package=__name__)
 del module
 
+
+def load_driver(name):
+    # imports dev_<name> on first use and returns its driver class
+    module = importlib.import_module('.dev_%s' % name, package=__name__)
+    return getattr(module, 'driver_%s' % name)
@@ -0,0 +1,110 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# one arbiter per physical bus, shared by all drivers on that bus
+# - GPIB: all instruments on one board (GPIB0::5::INSTR -> GPIB0)
+# - serial, USB, ...: the port itself (serial ports as in visa_pool)
+# transactions on a bus run one at a time, waiting ones are served by
+# priority (set point commands before routine polls), then in order
+# queue depth and bus utilization show when a bus is saturated
+
+import threading
+import time
+import heapq
+from collections import deque
+from contextlib import contextmanager
+from . import visa_pool
+
+COMMAND = 0
+POLL = 1
+
+lock = threading.Lock()
+arbiters = dict() # bus: arbiter
+
+
+def bus_of(port):
+    if port[0:4] == 'GPIB':
+        return port.split('::')[0]
+    return visa_pool.port_key(port)
+
+
+def get(port):
+    bus = bus_of(port)
+    with lock:
+        if bus not in arbiters:
+            arbiters[bus] = arbiter(bus)
+        return arbiters[bus]
+
+
+class arbiter():
+
+    def __init__(self, bus, window=10.0):
+        self.bus = bus
+        self.window = window # utilization over the last window in s
+        self.cond = threading.Condition()
+        self.queue = [] # heap of (priority, ticket)
+        self.ticket = 0
+        self.busy = False
+        self.tacquire = 0.0
+        self.history = deque() # (start, end) of the recent transactions
+        self.transactions = 0
+        self.maxdepth = 0
+        self.tcreate = time.monotonic()
+
+
+    @contextmanager
+    def transaction(self, priority=POLL):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+    def acquire(self, priority=POLL):
+        with self.cond:
+            self.ticket += 1
+            entry = (priority, self.ticket)
+            heapq.heappush(self.queue, entry)
+            if len(self.queue) > self.maxdepth:
+                self.maxdepth = len(self.queue)
+            while self.busy or self.queue[0] != entry:
+                self.cond.wait()
+            heapq.heappop(self.queue)
+            self.busy = True
+            self.tacquire = time.monotonic()
+
+
+    def release(self):
+        with self.cond:
+            now = time.monotonic()
+            self.history.append((self.tacquire, now))
+            while self.history and self.history[0][1] < now-self.window:
+                self.history.popleft()
+            self.transactions += 1
+            self.busy = False
+            self.cond.notify_all()
+
+
+    def depth(self):
+        # transactions waiting for the bus
+        return len(self.queue)
+
+
+    def utilization(self):
+        # busy fraction of the last window
+        with self.cond:
+            now = time.monotonic()
+            tmin = now-self.window
+            busy = sum([end-max(start, tmin) for start, end in self.history if end > tmin])
+            if self.busy:
+                busy += now-max(self.tacquire, tmin)
+            span = min(self.window, now-self.tcreate)
+        if span <= 0:
+            return 0.0
+        return min(busy/span, 1.0)
+
+
+    def summary(self):
+        return 'bus %s: %.0f %% busy, queue %d (max %d)' % (
+            self.bus, 100*self.utilization(), self.depth(), self.maxdepth)
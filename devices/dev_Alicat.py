@@ -5,65 +5,101 @@
 # https://www.alicat.com
 # https://documents.alicat.com/Alicat-Serial-Primer.pdf
 
-from PyQt5.QtCore import QThread
-import pyvisa
-import serial
+from . import visa_pool
 import time
+from .driver_base import driver_base
+from .serial_io import ser_query
+
+class Alicat_bus():
+    # schedules all units sharing one multi-drop line back-to-back
+    # a reply is complete with its CR, so the next transaction starts right
+    # after the previous frame arrived (no collisions on the shared line)
+    # set point and gas commands answer with the data frame of the unit,
+    # that frame is used as reading instead of polling the unit again
+    # a cycle starts with the first command or poll of a driver step and
+    # ends when every unit was read once
+
+    def __init__(self, query):
+        self.query = query
+        self.frames = 0
+        self.cycleframes = 0
+        self.framestart = 0
+        self.framerate = 0.0 # sustained frames/s on this port
+        self.tcycle = None
+        self.incycle = False
+
+
+    def transaction(self, deviceid, q):
+        readtime = time.time()
+        tmp = self.query(q).split()
+        # a valid data frame starts with the unit id
+        if tmp and tmp[0] == deviceid:
+            self.frames += 1
+            return readtime, tmp
+        return readtime, []
+
+
+    def begin(self):
+        if self.incycle:
+            return
+        self.incycle = True
+        tstart = time.monotonic()
+        if self.tcycle is not None and tstart > self.tcycle:
+            # frames of the last cycle over the time from cycle start to
+            # cycle start, i.e. including the idle time of the driver loop
+            rate = self.cycleframes/(tstart-self.tcycle)
+            if self.framerate == 0.0:
+                self.framerate = rate
+            else:
+                self.framerate = 0.8*self.framerate+0.2*rate
+        self.tcycle = tstart
+        self.framestart = self.frames
+
+
+    def command(self, deviceid, commands):
+        # sends the commands of each unit, returns the last valid reply
+        # frame per commanded unit {deviceidx: (readtime, frame)}
+        self.begin()
+        replies = dict()
+        for deviceidx, tmpid in enumerate(deviceid):
+            for q in commands.get(deviceidx, []):
+                readtime, tmp = self.transaction(tmpid, tmpid+q)
+                if tmp:
+                    replies[deviceidx] = (readtime, tmp)
+        return replies
+
+
+    def cycle(self, deviceid, replies=None):
+        # reads the units without a reply frame from command()
+        if replies is None:
+            replies = dict()
+        self.begin()
+        out = []
+        for deviceidx, tmpid in enumerate(deviceid):
+            if deviceidx in replies:
+                out.append(replies[deviceidx])
+            else:
+                out.append(self.transaction(tmpid, tmpid))
+        self.cycleframes = self.frames-self.framestart
+        self.incycle = False
+        return out
+
 
-class driver_Alicat(QThread):
+class driver_Alicat(driver_base):
+    name = 'Alicat'
 
     def __init__(self, config):
-        QThread.__init__(self)
-        self.port = config['dev_port']
+        driver_base.__init__(self, config, len(config['dev_id']))
         self.deviceid = config['dev_id']
         self.baudrate = config['dev_baudrate']
         self.devicetype = config['dev_type'] # 1: controller, 2: meter(, 3: pressure)
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
-        self.savefilename = config['dev_savefile']
+        self.Tquery = config['dev_Tquery']
         self.readtime = 0
-        self.runstate=False
-        self.ready = 0
-        self.error = 0
         if 'dev_sermode' in config:
             self.ser_mode = config['dev_sermode']
         else:
             self.ser_mode = 'serial'
 
-
-        value = True
-        while value:
-            try:
-                if self.ser_mode == 'visa':
-                    print('####### visa')
-                    if config['dev_interface'] == 'RS232':
-                        # just using COMX does not always work
-                        self.visaport = 'ASRL%s::INSTR' % self.port[3:]
-                    rm = pyvisa.ResourceManager()
-                    self.inst = rm.open_resource(self.visaport)
-                    if config['dev_interface'] == 'RS232':
-                        self.inst.baud_rate = self.baudrate
-                    self.inst.read_termination = '\r'
-                    self.inst.write_termination = '\r'
-                elif self.ser_mode == 'serial':
-                    print('####### serial')
-                    self.ser = serial.Serial(
-                        port=self.port,
-                        baudrate=self.baudrate
-                    )
-                print(' ... Alicat Serial connected ...')
-                value = False
-            except Exception:
-                print('Serial Error Alicat ...')
-                if self.retry:
-                    print(' ... trying again in a few seconds ...')
-                    time.sleep(self.Tretry)
-                    value = True
-                else:
-                    self.error = 1
-                    value = False
-
         self.keys = ['pressure', 'temperature', 'volumetric_flow', 'mass_flow','setpoint', 'gas']
         self.gases = ['Air', 'Ar', 'CH4', 'CO', 'CO2', 'C2H6', 'H2', 'He',
                       'N2', 'N2O', 'Ne', 'O2', 'C3H8', 'n-C4H10', 'C2H2',
@@ -72,14 +108,36 @@ class driver_Alicat(QThread):
                       'P-5']        
         self.setP = [0.0 for i in range(len(self.deviceid))]
         self.setPnew = [0.0 for i in range(len(self.deviceid))]
-        self.save = [False for i in range(len(self.deviceid))]
         self.setG = [0.0 for i in range(len(self.deviceid))]
         self.setGnew = [0.0 for i in range(len(self.deviceid))]
         self.val = [0.0 for i in range(len(self.deviceid))]
         self.valpressure = [0.0 for i in range(len(self.deviceid))]
-        self.dispbuf = ['' for i in range(len(self.deviceid))]
-        self.plotval = [[0.0] for i in range(len(self.deviceid))]
-
+        self.bus = Alicat_bus(self.ser_query)
+        self.framerate = 0.0
+        self.replies = dict() # reply frames of apply(), used by poll()
+        self.open(config)
+
+
+    def connect(self, config):
+        if self.ser_mode == 'visa':
+            print('####### visa')
+            if config['dev_interface'] == 'RS232':
+                # just using COMX does not always work
+                self.visaport = 'ASRL%s::INSTR' % self.port[3:]
+            self.poolport = self.visaport
+            self.inst = visa_pool.open_resource(self.visaport, self)
+            if config['dev_interface'] == 'RS232':
+                self.inst.baud_rate = self.baudrate
+            self.inst.read_termination = '\r'
+            self.inst.write_termination = '\r'
+            self.inst.timeout = self.Tquery*1000
+        elif self.ser_mode == 'serial':
+            print('####### serial')
+            self.poolport = self.port
+            self.ser = visa_pool.open_serial(self.port, self, self.baudrate)
+
+
+    def setup(self, config):
         # get first reading to populate the init values in the GUI
         self.getreading()
         for deviceidx, tmpvalue in enumerate(self.deviceid):
@@ -87,114 +145,97 @@ class driver_Alicat(QThread):
             self.setGnew[deviceidx] = self.setG[deviceidx]
 
 
-    def ser_query(self, q):
+    def ser_query(self, q, timeout=None):
+        # every reply (data frame) is terminated by CR
+        if timeout is None:
+            timeout = self.Tquery
         out = ''
         if (self.error == 0):
             if self.ser_mode == 'visa':
                 out = self.inst.query(q)
             elif self.ser_mode == 'serial':
-                self.ser.write(str.encode('%s\r' % q))
-                time.sleep(0.3)
-                out = self.ser.read(self.ser.in_waiting).decode('ASCII').rstrip()
+                out = ser_query(self.ser, q, b'\r', None, timeout)
         return out
 
 
-    def getreading(self):
-        for deviceidx, tmpvalue in enumerate(self.deviceid):
-                tmp = self.readAlicat(self.deviceid[deviceidx])
-                if self.devicetype[deviceidx] == 1: # flowcontroller
-                    if (len(tmp)==7):
-                        self.valpressure[deviceidx] = float(tmp[1])
-                        self.val[deviceidx] = float(tmp[4])
-                        self.setP[deviceidx] = float(tmp[5])
-                        if(self.save[deviceidx]):
-                            try:
-                                with open(self.savefilename[deviceidx],"a") as file_a:
-                                    file_a.write(str(self.readtime)+','+str(tmp[0])+','+str(tmp[1])+','+str(tmp[2])+','+str(tmp[3])+','+str(tmp[4])+','+str(tmp[5])+','+str(tmp[6])+'\n')
-                                file_a.close
-                            except Exception:
-                                self.error = 1
-                                self.save[deviceidx] = False
-                        try:
-                            self.setG[deviceidx] = self.gases.index(tmp[6])
-                        except Exception:
-                            self.error = 1
-                    self.dispbuf[deviceidx] = "%.2f sccm %.2f PSIA" % (self.val[deviceidx], self.valpressure[deviceidx])
-                    self.plotval[deviceidx] = [self.val[deviceidx]]
-                elif self.devicetype[deviceidx] == 2: # flowmeter
-                    if (len(tmp)==6):
-                        self.val[deviceidx] = float(tmp[4])
-                        self.valpressure[deviceidx] = float(tmp[1])
-                        if(self.save[deviceidx]):
-                            try:
-                                with open(self.savefilename[deviceidx],"a") as file_a:
-                                    file_a.write(str(self.readtime)+','+str(tmp[0])+','+str(tmp[1])+','+str(tmp[2])+','+str(tmp[3])+','+str(tmp[4])+','+str(tmp[5])+'\n')
-                                file_a.close
-                            except Exception:
-                                self.error = 1
-                                self.save[deviceidx] = False
-                        try:
-                            self.setG[deviceidx] = self.gases.index(tmp[5])
-                        except Exception:
-                            self.error = 1
-                    self.dispbuf[deviceidx] = "%.2f sccm %.2f PSIA" % (self.val[deviceidx], self.valpressure[deviceidx])
-                    self.plotval[deviceidx] = [self.val[deviceidx]]
-                elif self.devicetype[deviceidx] == 3: # pressure controller
-                    if (len(tmp)==3):
-                        self.val[deviceidx] = float(tmp[1])
-                        self.setP[deviceidx] = float(tmp[2])
-                        if(self.save[deviceidx]):
-                            try:
-                                with open(self.savefilename[deviceidx],"a") as file_a:
-                                    file_a.write(str(self.readtime)+','+str(tmp[0])+','+str(tmp[1])+','+str(tmp[2])+'\n')
-                                file_a.close
-                            except Exception:
-                                self.error = 1
-                                self.save[deviceidx] = False
-                        self.dispbuf[deviceidx] = "%.2f PSIA" % (self.val[deviceidx])
-                        self.plotval[deviceidx] = [self.val[deviceidx]]
+    def getreading(self, replies=None):
+        # completes the bus cycle, the reply frame of a command is the
+        # unit's reading
+        frames = self.bus.cycle(self.deviceid, replies)
+        for deviceidx, (readtime, tmp) in enumerate(frames):
+            self.readtime = readtime
+            self.parse_frame(deviceidx, tmp)
+        self.framerate = self.bus.framerate
+
+
+    def parse_frame(self, deviceidx, tmp):
+        if self.devicetype[deviceidx] == 1: # flowcontroller
+            if (len(tmp)==7):
+                self.valpressure[deviceidx] = float(tmp[1])
+                self.val[deviceidx] = float(tmp[4])
+                self.setP[deviceidx] = float(tmp[5])
+                self.record(deviceidx, self.readtime, *tmp)
+                self.publish(deviceidx, self.readtime, [self.val[deviceidx]])
+                try:
+                    self.setG[deviceidx] = self.gases.index(tmp[6])
+                except Exception:
+                    self.error = 1
+            self.dispbuf[deviceidx] = "%.2f sccm %.2f PSIA" % (self.val[deviceidx], self.valpressure[deviceidx])
+            self.plotval[deviceidx] = [self.val[deviceidx]]
+        elif self.devicetype[deviceidx] == 2: # flowmeter
+            if (len(tmp)==6):
+                self.val[deviceidx] = float(tmp[4])
+                self.valpressure[deviceidx] = float(tmp[1])
+                self.record(deviceidx, self.readtime, *tmp)
+                self.publish(deviceidx, self.readtime, [self.val[deviceidx]])
+                try:
+                    self.setG[deviceidx] = self.gases.index(tmp[5])
+                except Exception:
+                    self.error = 1
+            self.dispbuf[deviceidx] = "%.2f sccm %.2f PSIA" % (self.val[deviceidx], self.valpressure[deviceidx])
+            self.plotval[deviceidx] = [self.val[deviceidx]]
+        elif self.devicetype[deviceidx] == 3: # pressure controller
+            if (len(tmp)==3):
+                self.val[deviceidx] = float(tmp[1])
+                self.setP[deviceidx] = float(tmp[2])
+                self.record(deviceidx, self.readtime, *tmp)
+                self.publish(deviceidx, self.readtime, [self.val[deviceidx]])
+                self.dispbuf[deviceidx] = "%.2f PSIA" % (self.val[deviceidx])
+                self.plotval[deviceidx] = [self.val[deviceidx]]
 
 
     def setvalues(self):
+        # collect pending commands per unit, they are sent by apply()
+        commands = dict()
         for deviceidx, tmpvalue in enumerate(self.deviceid):
+            commands[deviceidx] = []
+            # set gas types first so the set point reply reports the new gas
+            if (self.setGnew[deviceidx]!=self.setG[deviceidx]):
+                commands[deviceidx].append("G"+str(self.setGnew[deviceidx]))
             if self.devicetype[deviceidx] == 1: # flowcontroller
                 # set setpoint
                 if (self.setPnew[deviceidx]!=self.setP[deviceidx]):
-                    _ = self.ser_query(self.deviceid[deviceidx]+"S"+str(self.setPnew[deviceidx]))
+                    commands[deviceidx].append("S"+str(self.setPnew[deviceidx]))
             elif self.devicetype[deviceidx] == 3: # pressure controller
                 # set setpoint
                 if (self.setPnew[deviceidx]!=self.setP[deviceidx]):
-                    _ = self.ser_query(self.deviceid[deviceidx]+"S"+str(self.setPnew[deviceidx]))
+                    commands[deviceidx].append("S"+str(self.setPnew[deviceidx]))
             #elif self.devicetype == 2: # flowmeter
-            # set gas types
-            if (self.setGnew[deviceidx]!=self.setG[deviceidx]):
-                _ = self.ser_query(self.deviceid[deviceidx]+"G"+str(self.setGnew[deviceidx]))
-
-
-    def readAlicat(self,deviceid):
-        self.readtime= time.time()
-        return self.ser_query(deviceid).rstrip().split()
+        return commands
 
 
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
+    def pending(self):
+        return any([len(commands) for commands in self.setvalues().values()])
 
 
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
+    def apply(self):
+        # set points and gas types with command priority, only the
+        # commanded units, their reply frames are read by poll()
+        self.replies = self.bus.command(self.deviceid, self.setvalues())
 
 
-    def run(self):
-        self.runstate=True
-        while self.runstate:
-            self.getreading()
-            self.setvalues()
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+    def poll(self):
+        # the units not answered in apply(), same cycle
+        replies = self.replies
+        self.replies = dict()
+        self.getreading(replies)
@@ -3,68 +3,56 @@
 
 # Keithley 2000 DMM
 
-from PyQt5.QtCore import QThread
-import pyvisa
+from . import visa_pool
+from . import arbiter
 import time
+from .driver_base import driver_base, visa_port
+from .scpi_binary import set_format, query_values
 
-class driver_K2000(QThread):
+class driver_K2000(driver_base):
+    name = 'K2000'
+    stop_on_error = False
 
     def __init__(self, config):
-        QThread.__init__(self)
-        self.port = config['dev_port']
+        driver_base.__init__(self, config)
         self.deviceid = config['dev_id']
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
-        self.savefilename = [config['dev_savefile']]
-
-        self.error = 0
         self.value = 0.0
         self.sensesett = "VOLT"
         self.ACDC = "DC"
-        self.save = [False]
         self.modes = ['V DC', 'A DC', 'V AC', 'A AC', 'Ω 2W', 'Ω 4W', '°C' , 'Freq', 'Per']
         self.unit = 'V'
         self.mode = config['dev_type']
         self.newmode = [self.mode]
-        self.runstate=False
-        self.ready = 0
-        self.dispbuf = ['']
-        self.plotval = [[0.0]]
-
-        value = True
-        while value:
-            if config['dev_interface'] == 'RS232':
-                # just using COMX does not always work
-                self.visaport = 'ASRL%s::INSTR' % self.port[3:]
-            elif config['dev_interface'][0:4] == 'GPIB':
-                self.visaport = '%s::%s::INSTR' % (config['dev_interface'],self.port)
-
-            try:
-                rm = pyvisa.ResourceManager()
-                self.inst = rm.open_resource(self.visaport)
-                if config['dev_interface'] == 'RS232':
-                    self.inst.baud_rate = config['dev_baudrate']
-                self.inst.query("*IDN?")
-                print(' ... Keithley 2000 connected ...')
-                value = False
-            except Exception:
-                print('Serial Error K2000 ...')
-                if self.retry:
-                    print(' ... trying again in a few seconds ...')
-                    time.sleep(self.Tretry)
-                    value = True
-                else:
-                    self.error = 1
-                    value = False
-
-        if (self.error == 0):
-            print(' ... setting up Keithley DMM 2000, please wait ..')
-            out = self.inst.query("*IDN?").rstrip()
-            if not (out[:len(self.deviceid)] == self.deviceid):
-                print('Error. Got IDN:',out,', expected: ',self.deviceid)
-                self.error = 1         
-
+        # buffered mode: number of readings per buffer (2..1024, 0: off)
+        # taken by the meter at dev_rate (Hz) and fetched in one transfer
+        if 'dev_buffer' in config:
+            self.bufferpoints = min(int(config['dev_buffer']), 1024)
+        else:
+            self.bufferpoints = 0
+        if 'dev_rate' in config:
+            self.bufferrate = config['dev_rate']
+        else:
+            self.bufferrate = 10
+        # reply format: IEEE 488.2 binary blocks instead of ASCII
+        if 'dev_binary' in config:
+            self.binary = config['dev_binary']
+        else:
+            self.binary = False
+        self.open(config)
+
+
+    def connect(self, config):
+        self.visaport = visa_port(config)
+        self.poolport = self.visaport
+        self.inst = visa_pool.open_resource(self.visaport, self)
+        if config['dev_interface'] == 'RS232':
+            self.inst.baud_rate = config['dev_baudrate']
+        self.inst.query("*IDN?")
+
+
+    def setup(self, config):
+        print(' ... setting up Keithley DMM 2000, please wait ..')
+        self.check_idn(self.deviceid)
         if (self.error == 0):
             self.inst.write("*RST")
             self.inst.write("*CLS")
@@ -72,23 +60,16 @@ class driver_K2000(QThread):
             self.inst.write(":INITiate:CONTinuous ON")
             time.sleep(1)
             self.switch_mode(config['dev_type'])
+            self.binary = set_format(self.inst, 'K2000', self.binary, config['dev_interface'])
+            if self.bufferpoints > 1:
+                self.setup_buffer()
+                if config['dev_interface'] == 'RS232':
+                    # ~16 characters per reading, 10 bits per character
+                    tfetch = self.bufferpoints*16*10/config['dev_baudrate']
+                    self.inst.timeout = max(self.inst.timeout, 1000*(2+tfetch))
             print(' ... done setting up Keithley DMM 2000 ..')
 
 
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
-
-
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
-
-
     def switch_mode(self, newmode):
         if newmode == 'V DC':
             print(' ... switching to', newmode)
@@ -114,7 +95,7 @@ class driver_K2000(QThread):
             self.inst.write(":FORM:ELEM READ")
             self.unit = 'V'
             self.mode = newmode
-            time.sleep(10)
+            self.idle(10)
         elif newmode == 'A AC':
             print(' ... switching to', newmode)
             self.inst.write(":SENS:FUNC 'CURR:AC'")
@@ -123,7 +104,7 @@ class driver_K2000(QThread):
             self.inst.write(":FORM:ELEM READ")
             self.unit = 'A'
             self.mode = newmode
-            time.sleep(10)
+            self.idle(10)
         elif newmode == '°C':
             print(' ... switching to', newmode)
             self.inst.write(":SENS:FUNC 'TEMP'")
@@ -160,31 +141,72 @@ class driver_K2000(QThread):
             self.unit = 's'
             self.mode = newmode
         # give it enough time to change settings
-        time.sleep(2)
-
-    def run(self):
-        self.runstate=True
-        while self.runstate:
-            if (self.error == 0):
-                try:
-                    if (self.mode != self.newmode[0]):
-                        self.switch_mode(self.newmode[0])
-
-                    self.value = float(self.inst.query(":FETCh?"))
-                    readtime = time.time()
-                    if(self.save[0]):
-                        try:
-                            with open(self.savefilename[0],"a") as file_a:
-                                file_a.write(str(readtime)+','+str(self.value)+','+self.unit+'\n')
-                            file_a.close
-                        except Exception:
-                            #self.error = 'Error saving K2000'
-                            self.save[0] = False                    
-                except Exception:
-                    print('Connection to K2000 lost.')
-                    #self.error = 1
-            self.dispbuf[0] = "%.5E %s" % (self.value,self.unit)
-            self.plotval[0] = [self.value]
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+        self.idle(2)
+
+
+    def setup_buffer(self):
+        # timer triggered readings stored in the trace buffer
+        print(' ... buffered mode: %d readings at %g Hz' % (self.bufferpoints, self.bufferrate))
+        self.inst.write(":INITiate:CONTinuous OFF")
+        self.inst.write(":ABORt")
+        self.inst.write(":SAMPle:COUNt 1")
+        self.inst.write(":TRIGger:SOURce TIMer")
+        self.inst.write(":TRIGger:TIMer %f" % (1.0/self.bufferrate))
+        self.inst.write(":TRIGger:COUNt %d" % self.bufferpoints)
+        self.inst.write(":TRACe:CLEar")
+        self.inst.write(":TRACe:POINts %d" % self.bufferpoints)
+        self.inst.write(":TRACe:FEED SENSe")
+
+
+    def fetch_buffer(self):
+        # fill the buffer once and fetch all readings in one transfer
+        # time stamps are reconstructed from the trigger timer
+        self.inst.write(":TRACe:CLEar")
+        self.inst.write(":TRACe:FEED:CONTrol NEXT")
+        starttime = time.time()
+        self.inst.write(":INITiate")
+        tfill = starttime+self.bufferpoints/self.bufferrate
+        # the bus is free for other instruments while the buffer fills
+        self.idle(tfill-time.time(), arbiter.POLL)
+        if not self.runstate:
+            self.inst.write(":ABORt")
+            return [], []
+        self.inst.query("*OPC?")
+        values = query_values(self.inst, ":TRACe:DATA?", self.binary, self.bufferpoints)
+        readtimes = [starttime+i/self.bufferrate for i in range(len(values))]
+        return readtimes, values
+
+
+    def latency(self):
+        # a buffer is recorded once it is full
+        if self.bufferpoints > 1:
+            return self.bufferpoints/self.bufferrate+driver_base.latency(self)
+        return driver_base.latency(self)
+
+
+    def pending(self):
+        return self.mode != self.newmode[0]
+
+
+    def apply(self):
+        if (self.mode != self.newmode[0]):
+            self.switch_mode(self.newmode[0])
+            if self.bufferpoints > 1:
+                self.setup_buffer()
+
+
+    def poll(self):
+        if self.bufferpoints > 1:
+            readtimes, values = self.fetch_buffer()
+        else:
+            values = query_values(self.inst, ":FETCh?", self.binary, 1)
+            readtimes = [time.time()]
+        self.publish_many(0, readtimes, values)
+        if len(values):
+            self.value = float(values[-1])
+        self.record_rows(0, [(readtime, value, self.unit) for readtime, value in zip(readtimes, values)])
+
+
+    def display(self):
+        self.dispbuf[0] = "%.5E %s" % (self.value,self.unit)
+        self.plotval[0] = [self.value]
@@ -4,77 +4,61 @@
 # Keithley 2100 Series: 6½-Digit USB Multimeter
 # only USB interface
 
-from PyQt5.QtCore import QThread
-import pyvisa
+from . import visa_pool
 import time
+from .driver_base import driver_base
+from .scpi_binary import set_format, query_values
 
-class driver_K2100(QThread):
+class driver_K2100(driver_base):
+    name = 'K2100'
+    stop_on_error = False
 
     def __init__(self, config):
-        QThread.__init__(self)
+        driver_base.__init__(self, config)
         self.deviceid = config['dev_id']
         self.deviceport = config['dev_port']
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
-        
-        self.savefilename = [config['dev_savefile']]
-        self.error = 0
         self.value = 0.0
-        self.save = [False]
         self.modes = ['V DC', 'A DC', 'V AC', 'A AC', 'Ω 2W', 'Ω 4W', '°C' , 'Freq', 'Per']
         self.unit = ''
         self.mode = config['dev_type']
         self.newmode = [self.mode]
-        self.runstate=False
-        self.ready = 0
-        self.dispbuf = ['']
-        self.plotval = [[0.0]]
-
-        value = True
-        while value:
-            try:
-                    rm = pyvisa.ResourceManager()
-                    self.inst = rm.open_resource(self.deviceport)
-                    self.inst.query("*IDN?")
-                    print(' ... Keithley 2100 connected ...')
-                    value = False
-            except Exception:
-                    print('Error connecting K2100 ...')
-                    if self.retry:
-                        print(' ... trying again in a few seconds ...')
-                        time.sleep(self.Tretry)
-                        value = True
-                    else:
-                        self.error = 1
-                        value = False
+        # reply format: IEEE 488.2 binary blocks instead of ASCII
+        if 'dev_binary' in config:
+            self.binary = config['dev_binary']
+        else:
+            self.binary = False
+        # burst mode: readings per READ? (0: off), one every 1/dev_rate s
+        if 'dev_burst' in config:
+            self.burstpoints = int(config['dev_burst'])
+        else:
+            self.burstpoints = 0
+        if 'dev_rate' in config:
+            self.burstrate = config['dev_rate']
+        else:
+            self.burstrate = 10
+        # measured time per reading of the last burst
+        self.Tsample = 1.0/self.burstrate
+        self.open(config)
+
+
+    def connect(self, config):
+        self.poolport = self.deviceport
+        self.inst = visa_pool.open_resource(self.deviceport, self)
+        self.inst.query("*IDN?")
 
-        if (self.error == 0):
-            print(' ... setting up Keithley DMM 2100, please wait ..')
-            out = self.inst.query("*IDN?").rstrip()
-            if not (out[:len(self.deviceid)] == self.deviceid):
-                print('Error. Got IDN:',out,', expected: ',self.deviceid)
-                self.error = 1         
 
+    def setup(self, config):
+        print(' ... setting up Keithley DMM 2100, please wait ..')
+        self.check_idn(self.deviceid)
         if (self.error == 0):
             self.inst.write("*RST")
             self.inst.write("*CLS")
             self.switch_mode(config['dev_type'])
+            # the 2100 has no binary format, replies are still parsed by numpy
+            self.binary = set_format(self.inst, 'K2100', self.binary, config['dev_interface'])
+            if self.burstpoints > 1:
+                self.setup_burst()
             print(' ... done setting up Keithley DMM 2100 ..')
-            
-            
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
-
-
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
 
 
     def switch_mode(self, newmode):
@@ -133,32 +117,64 @@ class driver_K2100(QThread):
             self.unit = 's'
             self.mode = newmode
         # give it enough time to change settings
-        time.sleep(2)
-
-
-    def run(self):
-        self.runstate=True
-        while self.runstate:
-            if (self.error == 0):
-                try:
-                    if (self.mode != self.newmode[0]):
-                        self.switch_mode(self.newmode[0])
-
-                    self.value = float(self.inst.query("READ?"))
-                    readtime = time.time()
-                    if(self.save[0]):
-                        try:
-                            with open(self.savefilename[0],"a") as file_a:
-                                file_a.write(str(readtime)+','+str(self.value)+','+self.unit+'\n')
-                            file_a.close
-                        except Exception:
-                            #self.error = 'Error saving K2000'
-                            self.save[0] = False                    
-                except Exception:                        
-                    print('Connection to K2100 lost.')
-                    #self.error = 1
-            self.dispbuf[0] = "%.5E %s" % (self.value,self.unit)
-            self.plotval[0] = [self.value]
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+        self.idle(2)
+
+
+    def setup_burst(self):
+        # the trigger delay is inserted before each sample of the count,
+        # keep the integration time short compared to 1/dev_rate
+        print(' ... burst mode: %d readings at %g Hz' % (self.burstpoints, self.burstrate))
+        self.inst.write("TRIG:SOUR IMM")
+        self.inst.write("TRIG:COUN 1")
+        self.inst.write("TRIG:DEL %f" % (1.0/self.burstrate))
+        self.inst.write("SAMP:COUN %d" % self.burstpoints)
+        self.inst.timeout = max(self.inst.timeout, 1000*(2+self.burstpoints/self.burstrate))
+
+
+    def read_burst(self):
+        # N readings in one USB transaction
+        # the sample interval is taken from the instrument: READ? returns
+        # after the last sample, so trigger delay, integration time (NPLC)
+        # and autozero are all in the measured time of the burst
+        starttime = time.time()
+        values = query_values(self.inst, "READ?", self.binary, self.burstpoints)
+        endtime = time.time()
+        if len(values):
+            self.Tsample = (endtime-starttime)/len(values)
+        readtimes = [starttime+(i+1)*self.Tsample for i in range(len(values))]
+        return readtimes, values
+
+
+    def latency(self):
+        # a burst is recorded after its last reading
+        if self.burstpoints > 1:
+            return self.burstpoints*self.Tsample+driver_base.latency(self)
+        return driver_base.latency(self)
+
+
+    def pending(self):
+        return self.mode != self.newmode[0]
+
+
+    def apply(self):
+        if (self.mode != self.newmode[0]):
+            self.switch_mode(self.newmode[0])
+            if self.burstpoints > 1:
+                self.setup_burst()
+
+
+    def poll(self):
+        if self.burstpoints > 1:
+            readtimes, values = self.read_burst()
+        else:
+            values = query_values(self.inst, "READ?", self.binary, 1)
+            readtimes = [time.time()]
+        self.publish_many(0, readtimes, values)
+        if len(values):
+            self.value = float(values[-1])
+        self.record_rows(0, [(readtime, value, self.unit) for readtime, value in zip(readtimes, values)])
+
+
+    def display(self):
+        self.dispbuf[0] = "%.5E %s" % (self.value,self.unit)
+        self.plotval[0] = [self.value]
@@ -4,25 +4,23 @@
 # Keithley 2400 Sourcemeter
 # K2440
 
-from PyQt5.QtCore import QThread
-import pyvisa
+import numpy as np
+from . import visa_pool
 import time
+from .driver_base import driver_base, visa_port
+from storage import writer
+from storage import layouts
+from .scpi_binary import set_format, query_values
 
-class driver_K2400(QThread):
+class driver_K2400(driver_base):
+    name = 'K2400'
 
     def __init__(self, config):
-        QThread.__init__(self)
-        self.port = config['dev_port']
+        driver_base.__init__(self, config)
         self.deviceid = config['dev_id']
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
-        self.savefilename = [config['dev_savefile']]
-        self.error = 0
         self.value = [0.0, 0.0]
         self.state = False # on or off
         self.newstate = [self.state] # on or off
-        self.save = [False]
         self.modes = ['V', 'A']
         self.mode = config['dev_type']
         self.newmode = [self.mode]
@@ -31,70 +29,49 @@ class driver_K2400(QThread):
         self.newsetP = [self.setP]
         self.compliance = config['dev_compliance']
         self.newcompliance = [self.compliance]
-        self.runstate=False
-        self.ready = 0
-        self.dispbuf = ['']
-        self.plotval = [[0.0]]
         self.term = config['dev_term']
+        # reply format: IEEE 488.2 binary blocks instead of ASCII
+        if 'dev_binary' in config:
+            self.binary = config['dev_binary']
+        else:
+            self.binary = False
+        # sweeps run on the SourceMeter trigger model, requested by the GUI
+        # through newsweep, the last curve is kept in sweepdata (V, A)
+        self.sweeps = ['LIN', 'LOG', 'LIST']
+        self.newsweep = [None]
+        self.sweepdata = (np.zeros(0), np.zeros(0))
+        self.sweepcount = 0
+        self.sweeperror = '' # message of the last failed sweep
+        if 'dev_sweepfile' in config:
+            self.sweepfilename = config['dev_sweepfile']
+        else:
+            self.sweepfilename = ''
+        self.open(config)
 
-        # connect to device
-        value = True
-        while value:
-            if config['dev_interface'] == 'RS232':
-                # just using COMX does not always work
-                self.visaport = 'ASRL%s::INSTR' % self.port[3:]
-            elif config['dev_interface'][0:4] == 'GPIB':
-                self.visaport = '%s::%s::INSTR' % (config['dev_interface'],self.port)
-
-            try:
-                rm = pyvisa.ResourceManager()
-                self.inst = rm.open_resource(self.visaport)
-                if config['dev_interface'] == 'RS232':
-                    self.inst.baud_rate = config['dev_baudrate']
-                self.inst.query("*IDN?")
-                print(' ... Keithley 2400 connected ...')
-                value = False
-            except Exception:
-                print('Serial Error K2400 ...')
-                if self.retry:
-                    print(' ... trying again in a few seconds ...')
-                    time.sleep(self.Tretry)
-                    value = True
-                else:
-                    self.error = 1
-                    value = False
 
-        # check device ID
-        if (self.error == 0):
-            print(' ... setting up Keithley 2400, please wait ..')
-            out = self.inst.query("*IDN?").rstrip()
-            if not (out[:len(self.deviceid)] == self.deviceid):
-                print('Error. Got IDN:',out,', expected: ',self.deviceid)
-                self.error = 1
+    def connect(self, config):
+        self.visaport = visa_port(config)
+        self.poolport = self.visaport
+        self.inst = visa_pool.open_resource(self.visaport, self)
+        if config['dev_interface'] == 'RS232':
+            self.inst.baud_rate = config['dev_baudrate']
+        self.inst.query("*IDN?")
 
+
+    def setup(self, config):
+        # check device ID
+        print(' ... setting up Keithley 2400, please wait ..')
+        self.check_idn(self.deviceid)
         # initialize device
         if (self.error == 0):
             self.inst.write(":OUTP OFF")
             self.inst.write("*RST")
             self.switch_mode(self.mode)
+            self.binary = set_format(self.inst, 'K2400', self.binary, config['dev_interface'])
             self.set_val(self.setP)
             print(' ... done setting up Keithley 2400 ..')
 
 
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
-
-
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
-
-
     def switch_mode(self, newmode):
         if newmode == 'V':
             print(' ... switching to',newmode)
@@ -117,7 +94,7 @@ class driver_K2400(QThread):
             self.inst.write(f":ROUT:TERM {self.term}")
             self.mode = newmode
         # give it enough time to change settings
-        time.sleep(2)
+        self.idle(2)
 
 
     def set_val(self, val):
@@ -151,61 +128,156 @@ class driver_K2400(QThread):
         print('turn off Keithley 2400')
 
 
-    def run(self):
-        self.runstate=True
-        outval = None
-        while self.runstate:
-            if (self.error == 0):
-                try:
-                    if (self.compliance != self.newcompliance[0]):
-                        self.set_compliance(self.newcompliance[0])
-
-                    if (self.mode != self.newmode[0]):
-                        # switching mode turns output off
-                        self.switch_mode(self.newmode[0])
-
-
-                    if (self.setP!=self.newsetP[0]):
-                        self.set_val(self.newsetP[0])
-
-                    if (self.state!=self.newstate[0]):
-                        if self.newstate[0]:
-                            self.switch_on()
-                        else:
-                            self.switch_off()
-
-                    # is output on?
-                    if self.state:
-                        outval = self.inst.query(":READ?").rstrip().split(',')
-                        readtime = time.time()
-                        if len(outval) == 2:
-                            self.value = [float(i) for i in outval]
-                        elif len(outval) == 1:
-                            # e.g. for pulsed mode
-                            if self.mode == 'V':
-                                self.value[0] = self.setP
-                                self.value[1] = outval[0]
-                            elif self.mode == 'A':
-                                self.value[0] = outval[0]
-                                self.value[1] = self.setP
-                        if(self.save[0]):
-                            try:
-                                with open(self.savefilename[0],"a") as file_a:
-                                    file_a.write(str(readtime)+','+str(self.value[0])+','+str(self.value[1])+'\n')
-                                file_a.close
-                            except Exception:
-                                #self.error = 'Error saving K2400'
-                                print('Error saving K2400.')
-                                self.save[0] = False
-                except Exception:
-                    print('Connection to K2400 lost.')
-                    self.error = 1
+    def check_sweep(self, spacing, start=0.0, stop=0.0, points=2, values=None, delay=0.0):
+        # raises ValueError for sweeps the instrument would reject
+        if spacing not in self.sweeps:
+            raise ValueError('unknown sweep %s' % spacing)
+        if delay < 0:
+            raise ValueError('negative delay')
+        if spacing == 'LIST':
+            if values is None or not 1 <= len(values) <= 100:
+                raise ValueError('LIST sweep needs 1 to 100 points')
+        else:
+            if not 2 <= points <= 2500:
+                raise ValueError('%s sweep needs 2 to 2500 points' % spacing)
+            if spacing == 'LOG' and (start <= 0 or stop <= 0):
+                raise ValueError('LOG sweep needs start and stop > 0')
+
+
+    def sweep(self, spacing, start=0.0, stop=0.0, points=2, values=None, delay=0.0):
+        # linear, log or list sweep of the source, all points are measured
+        # by the instrument and fetched with one :FETC?, the bus is free
+        # for other instruments while the sweep runs
+        # returns (V, A) as arrays
+        self.check_sweep(spacing, start, stop, points, values, delay)
+        # source delay of the single set point, restored after the sweep
+        sourcedelay = self.inst.query(":SOUR:DEL?").strip()
+        if self.mode == 'V':
+            func = 'VOLT'
+        else:
+            func = 'CURR'
+        if spacing == 'LIST':
+            # max 100 points
+            points = len(values)
+            self.inst.write(":SOUR:%s:MODE LIST" % func)
+            self.inst.write(":SOUR:LIST:%s %s" % (func, ','.join(['%g' % i for i in values])))
+        else:
+            # max 2500 points
+            self.inst.write(":SOUR:%s:MODE SWE" % func)
+            self.inst.write(":SOUR:SWE:SPAC %s" % spacing)
+            self.inst.write(":SOUR:%s:STAR %g" % (func, start))
+            self.inst.write(":SOUR:%s:STOP %g" % (func, stop))
+            self.inst.write(":SOUR:SWE:POIN %d" % points)
+        timeout = self.inst.timeout
+        try:
+            self.inst.write(":SOUR:DEL %g" % delay)
+            self.inst.write(":TRIG:COUN %d" % points)
+            print(' ... %s sweep with %d points' % (spacing, points))
+            # also covers the transfer of all points
+            self.inst.timeout = max(timeout, 1000*(10+points*(delay+0.1)))
+            tend = time.monotonic()+self.inst.timeout/1000
+            self.inst.write(":OUTP ON")
+            # operation complete (ESR bit 0) once all points are measured
+            self.inst.query("*ESR?")
+            self.inst.write(":INIT")
+            self.inst.write("*OPC")
+            while not int(self.inst.query("*ESR?")) & 1:
+                if time.monotonic() > tend:
+                    raise TimeoutError('sweep not complete')
+                if self.idle(0.1):
+                    raise RuntimeError('sweep stopped')
+            # FORM:ELEM VOLT,CURR
+            outval = query_values(self.inst, ":FETC?", self.binary, 2*points)
+        finally:
+            self.inst.write(":ABOR")
+            self.inst.timeout = timeout
+            # back to the single set point
+            if not self.state:
+                self.inst.write(":OUTP OFF")
+            self.inst.write(":TRIG:COUN 1")
+            self.inst.write(":SOUR:%s:MODE FIX" % func)
+            self.inst.write(":SOUR:DEL %s" % sourcedelay)
+            self.set_val(self.setP)
+        outval = np.reshape(outval, (-1, 2))
+        return outval[:,0], outval[:,1]
+
+
+    def run_sweep(self, request):
+        # a failed sweep is reported, the driver keeps running
+        sweeptime = time.time()
+        try:
+            self.sweepdata = self.sweep(**request)
+        except Exception as e:
+            print('Sweep Error %s: %s' % (self.name, str(e)))
+            self.sweeperror = str(e)
+            return
+        self.sweeperror = ''
+        self.sweepcount += 1
+        if self.sweepfilename != '':
+            writer.get().write(self.sweepfilename,
+                               [(sweeptime, V, A) for V, A in zip(*self.sweepdata)],
+                               layouts.get('K2400 sweep', 3), self.label(0)+' sweep',
+                               rollup=False)
+
+
+    def pending(self):
+        return (self.compliance != self.newcompliance[0] or
+                self.mode != self.newmode[0] or
+                self.setP != self.newsetP[0] or
+                self.state != self.newstate[0] or
+                self.newsweep[0] is not None)
+
+
+    def apply(self):
+        if (self.compliance != self.newcompliance[0]):
+            self.set_compliance(self.newcompliance[0])
+
+        if (self.mode != self.newmode[0]):
+            # switching mode turns output off
+            self.switch_mode(self.newmode[0])
+
+        if (self.setP!=self.newsetP[0]):
+            self.set_val(self.newsetP[0])
+
+        if (self.state!=self.newstate[0]):
+            if self.newstate[0]:
+                self.switch_on()
+            else:
+                self.switch_off()
+
+        if self.newsweep[0] is not None:
+            request = self.newsweep[0]
+            self.newsweep[0] = None
+            self.run_sweep(request)
+
+
+    def poll(self):
+        # is output on?
+        if self.state:
+            # FORM:ELEM VOLT,CURR
+            outval = query_values(self.inst, ":READ?", self.binary, 2)
+            readtime = time.time()
+            if len(outval) == 2:
+                self.value = [float(i) for i in outval]
+            elif len(outval) == 1:
+                # e.g. for pulsed mode
+                if self.mode == 'V':
+                    self.value[0] = self.setP
+                    self.value[1] = outval[0]
+                elif self.mode == 'A':
+                    self.value[0] = outval[0]
+                    self.value[1] = self.setP
+            self.record(0, readtime, self.value[0], self.value[1])
             if self.mode == 'V':
-                self.dispbuf[0] = "%e %s" % (self.value[1],self.unit)
-                self.plotval[0] = [self.value[1]]
+                self.publish(0, readtime, [self.value[1]])
             elif self.mode == 'A':
-                self.dispbuf[0] = "%e %s" % (self.value[0],self.unit)
-                self.plotval[0] = [self.value[0]]
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+                self.publish(0, readtime, [self.value[0]])
+
+
+    def display(self):
+        if self.mode == 'V':
+            self.dispbuf[0] = "%e %s" % (self.value[1],self.unit)
+            self.plotval[0] = [self.value[1]]
+        elif self.mode == 'A':
+            self.dispbuf[0] = "%e %s" % (self.value[0],self.unit)
+            self.plotval[0] = [self.value[0]]
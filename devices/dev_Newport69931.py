@@ -1,112 +1,75 @@
 # Licence: GNU General Public License version 2 (GPLv2)
 # (C) 2019-2021 Matthias H. Richter
 
-from PyQt5.QtCore import QThread
-import serial
+from . import visa_pool
 import time
+from .driver_base import driver_base
+
+class driver_Newport69931(driver_base):
+    name = 'Newport69931'
 
-class driver_Newport69931(QThread):
     def __init__(self, config):
-        QThread.__init__(self)
+        driver_base.__init__(self, config)
         self.serialport = config['dev_port']
         self.baudrate = config['dev_baudrate']
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
         self.dev_Tblock = config['dev_Tblock']
-        self.error = 0
         self.state = False
         self.newstate = [False]
-        self.runstate=False
-        self.ready = 0
-        self.dispbuf = ['']
-        self.plotval = [[0.0]]
-
-        value = True
-        while value:
-            try:
-                self.serNewport69931 = serial.Serial(
-                    port=self.serialport,
-                    baudrate=self.baudrate
-                )
-                print(' ... Newport69931 Serial connected ...')
-                value = False
-            except Exception:
-                print('Serial Error Newport69931 ...')
-                if self.retry:
-                    print(' ... trying again in a few seconds ...')
-                    time.sleep(self.Tretry)
-                    value = True
-                else:
-                    self.error = 1
-                    value = False
-        if (self.error == 0):
-            self.serNewport69931.close()
-            self.serNewport69931.open()
-            if not self.serNewport69931.isOpen():
-                print('Serial port error')
-                self.error = 1
-            try:
-                self.serNewport69931.write(str.encode('STB?\r\n'))
-                time.sleep(0.5)
-                out=''
-                out = self.serNewport69931.read(self.serNewport69931.in_waiting)
-                out = out.rstrip()
-                test = bin(int(out[3:],16))
-                if (len(test)<10):
-                    print('Lamp is off')
-                    self.state = False
-                elif (test[9] == '1'):
-                    print('Lamp is on')
-                    self.state = True                
-                else:
-                    print('Lamp is off')
-                    self.state = False
-                self.newstate[0] = self.state
-            except Exception:
-                print('Serial Error Newport69931 ...')
-                self.error = 1
+        self.tblock = 0.0 # monotonic time the lamp state is locked until
+        self.open(config)
 
 
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
+    def connect(self, config):
+        self.poolport = self.serialport
+        self.serNewport69931 = visa_pool.open_serial(self.serialport, self, self.baudrate)
 
 
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
+    def setup(self, config):
+        self.serNewport69931.close()
+        self.serNewport69931.open()
+        if not self.serNewport69931.isOpen():
+            print('Serial port error')
+            self.error = 1
+        try:
+            self.serNewport69931.write(str.encode('STB?\r\n'))
+            time.sleep(0.5)
+            out=''
+            out = self.serNewport69931.read(self.serNewport69931.in_waiting)
+            out = out.rstrip()
+            test = bin(int(out[3:],16))
+            if (len(test)<10):
+                print('Lamp is off')
+                self.state = False
+            elif (test[9] == '1'):
+                print('Lamp is on')
+                self.state = True                
+            else:
+                print('Lamp is off')
+                self.state = False
+            self.newstate[0] = self.state
+        except Exception:
+            print('Serial Error Newport69931 ...')
+            self.error = 1
 
 
     def block(self):
-        for _ in range(int(self.Tblock)):
-            time.sleep(1)
-            if not self.runstate:
-                break
+        # lamp state is locked for dev_Tblock, a new state waits until then
+        # (no wait in the hook, the loop keeps running)
+        self.tblock = time.monotonic()+self.dev_Tblock
+
+
+    def pending(self):
+        return self.state != self.newstate[0] and time.monotonic() >= self.tblock
 
 
-    def run(self):
-        self.runstate=True
-        while self.runstate:
-            if (self.error == 0):
-                try:
-                    if (self.state!=self.newstate[0]):
-                        self.state = self.newstate[0]
-                        if self.newstate[0]:
-                            self.serNewport69931.write(str.encode('START\r\n'))
-                            self.block()
-#                            time.sleep(self.Tblock)
-                        else:
-                            self.serNewport69931.write(str.encode('STOP\r\n'))
-                            self.block()
-#                            time.sleep(self.Tblock)
-                except Exception:
-                    print('Connection to Newport69931 lost.')
-                    self.error = 1
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+    def apply(self):
+        if (self.state!=self.newstate[0]) and time.monotonic() >= self.tblock:
+            self.state = self.newstate[0]
+            if self.newstate[0]:
+                self.serNewport69931.write(str.encode('START\r\n'))
+                self.block()
+#                time.sleep(self.Tblock)
+            else:
+                self.serNewport69931.write(str.encode('STOP\r\n'))
+                self.block()
+#                time.sleep(self.Tblock)
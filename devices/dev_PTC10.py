@@ -4,104 +4,60 @@
 # SRS PTC10 — Programmable temperature controller
 # https://www.thinksrs.com/downloads/pdfs/manuals/PTC10m.pdf
 
-from PyQt5.QtCore import QThread
-import pyvisa
+from . import visa_pool
 import time
+from .driver_base import driver_base, visa_port
 
-class driver_PTC10(QThread):
+class driver_PTC10(driver_base):
+    name = 'PTC10'
 
     def __init__(self, config):
-        QThread.__init__(self)
-        self.port = config['dev_port']
-        self.retry = config['dev_retry']
-        self.Tretry = config['dev_Tretry']
-        self.Tdriver = config['dev_Tdriver']
+        driver_base.__init__(self, config, len(config['dev_type']))
         self.dev_type = config['dev_type']
-        self.savefilename = config['dev_savefile']
         self.units = config['dev_units']
-        self.error = 0
         self.val = ['' for i in range(len(self.dev_type))]
-        self.save = [False for i in range(len(self.dev_type))]
         self.valnames = ['' for i in range(len(self.dev_type))]
-        self.dispbuf = ['' for i in range(len(self.dev_type))]
-        self.plotval = [[0.0] for i in range(len(self.dev_type))]
-
-        self.runstate=False
-        self.ready = 0
-        value = True
-        while value:
-            if config['dev_interface'] == 'RS232':
-                # just using COMX does not always work
-                self.visaport = 'ASRL%s::INSTR' % self.port[3:]
-            elif config['dev_interface'][0:4] == 'GPIB':
-                self.visaport = '%s::%s::INSTR' % (config['dev_interface'],self.port)
-            #elif config['dev_interface'] == 'ETH':
-            
-            try:
-                rm = pyvisa.ResourceManager()
-                self.inst = rm.open_resource(self.visaport)
-                if config['dev_interface'] == 'RS232':
-                    self.inst.baud_rate = config['dev_baudrate']
-                    self.inst.write_termination = '\n'
-                print(' ... PTC10 connected ...')
-                value = False
-            except Exception:
-                print('Serial Error PTC10 ...')
-                if self.retry:
-                    print(' ... trying again in a few seconds ...')
-                    time.sleep(self.Tretry)
-                    value = True
-                else:
-                    self.error = 1
-                    value = False
+        self.open(config)
 
 
-        if (self.error == 0):
-            out = self.inst.query("getOutputNames?").rstrip().split(",")
-            self.valnames = [out[i-1] for i in self.dev_type]
-            print(' ...',self.valnames)
+    def connect(self, config):
+        #elif config['dev_interface'] == 'ETH':
+        self.visaport = visa_port(config)
+        self.poolport = self.visaport
+        self.inst = visa_pool.open_resource(self.visaport, self)
+        if config['dev_interface'] == 'RS232':
+            self.inst.baud_rate = config['dev_baudrate']
+            self.inst.write_termination = '\n'
 
 
-    def __del__(self):
-        if self.ready !=0:
-            self.stop()
-            self.wait()
+    def setup(self, config):
+        out = self.inst.query("getOutputNames?").rstrip().split(",")
+        self.valnames = [out[i-1] for i in self.dev_type]
+        print(' ...',self.valnames)
 
 
-    def stop(self):
-        self.runstate=False
-        time.sleep(self.Tdriver)
-        while(self.ready !=0):
-            print(' ... waiting for shutdown')
-            time.sleep(0.1)
+    def poll(self):
+        out = self.inst.query("getOutput?")
+        readtime = time.time()
+        try:
+            self.values = out.rstrip().split(",")
+            self.val = [self.values[i-1] for i in self.dev_type]
+        except Exception:
+            self.val = ["" for i in range(len(self.dev_type))]
 
-    def run(self):
-        self.runstate=True
-        while self.runstate:
-            if (self.error == 0):
-                try:
-                    out = self.inst.query("getOutput?")
-                    readtime = time.time()
-                    try:
-                        self.values = out.rstrip().split(",")
-                        self.val = [self.values[i-1] for i in self.dev_type]
-                    except Exception:
-                        self.val = ["" for i in range(len(self.dev_type))]
+        for deviceidx in range(len(self.dev_type)):
+            self.record(deviceidx, readtime, self.val[deviceidx])
+            try:
+                self.publish(deviceidx, readtime, [float(self.val[deviceidx])])
+            except ValueError:
+                pass
 
-                    for deviceidx, tmpvalue in enumerate(self.save):
-                        if(tmpvalue):
-                            try:
-                                with open(self.savefilename[deviceidx],"a") as file_a:
-                                    file_a.write(str(readtime)+','+self.val[deviceidx]+'\n')
-                                file_a.close
-                            except Exception:
-                                self.save[deviceidx] = False
 
-                except Exception:
-                    print('Connection to PTC10 lost.')
-                    self.error = 1
-            self.dispbuf = ["%s %s" % (self.val[i],self.units[i]) for i in range(len(self.dev_type))]
-            self.plotval = [[float(self.val[i])] for i in range(len(self.dev_type))]
-            self.ready = 1
-            time.sleep(self.Tdriver)
-        self.ready = 0
+    def display(self):
+        self.dispbuf = ["%s %s" % (self.val[i],self.units[i]) for i in range(len(self.dev_type))]
+        for i in range(len(self.dev_type)):
+            try:
+                self.plotval[i] = [float(self.val[i])]
+            except ValueError:
+                # no reading yet
+                self.plotval[i] = [0.0]
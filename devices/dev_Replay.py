@@ -0,0 +1,211 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# Replay of recorded save files (CSV or .ezb) as if an instrument sent them
+# the rows go through record()/publish()/dispbuf/plotval like readings of a
+# real driver, e.g. to test plots and save files without hardware
+# config:
+# - dev_port:       recorded file, a list for one channel per file
+# - dev_layout:     driver which wrote the files (columns, e.g. 'K2000')
+# - dev_column:     column shown and plotted (default: first number column)
+# - dev_speed:      1: real time, 100: 100 x faster, 0: as fast as possible
+#                   (dev_block rows per loop, times as recorded)
+# - dev_timestamps: 'replay': the recording starts now, times divided by
+#                   dev_speed, 'original': times as recorded
+# - dev_loop:       start again once all files ended (together, aligned)
+
+import os
+import time
+import numpy as np
+from .driver_base import driver_base
+from storage import csvload
+from storage import binrec
+
+
+def read_blocks(filename, driver):
+    # (layout, generator of blocks name: array) of a recorded file
+    if os.path.splitext(filename)[1].lower() == '.ezb':
+        reader = binrec.binrec_reader(filename)
+        return [tuple(column) for column in reader.columns], binrec_blocks(reader)
+    loader = csvload.csv_loader(filename, driver)
+    return loader.layout, loader.chunks()
+
+
+def binrec_blocks(reader):
+    for chunkidx in range(len(reader.chunks)):
+        block = dict(reader.chunk(chunkidx))
+        for idx, (name, unit, kind) in enumerate(reader.columns):
+            if kind == 't':
+                block[name] = np.array([reader.categories[idx][int(code)] for code in block[name]], dtype=str)
+        yield block
+
+
+class replay_file():
+
+    def __init__(self, filename, driver):
+        self.filename = filename
+        self.driver = driver
+        self.rows = 0 # replayed rows
+        self.t0 = None # recorded time replayed at tbase of the driver
+        self.restart()
+
+
+    def restart(self):
+        # from the first row again, t0 is kept (shared by all files of the
+        # driver, see driver_Replay.setup)
+        self.layout, self.source = read_blocks(self.filename, self.driver)
+        self.names = [column[0] for column in self.layout]
+        self.block = None
+        self.pos = 0
+        self.done = False
+        self.next_block()
+        if self.t0 is None and not self.done:
+            self.t0 = float(self.block['time'][0])
+
+
+    def next_block(self):
+        # next block with rows
+        self.pos = 0
+        while True:
+            try:
+                self.block = next(self.source)
+            except StopIteration:
+                self.block = None
+                self.done = True
+                return
+            if len(self.block['time']):
+                return
+
+
+    def take(self, trec=None, count=None):
+        # the next rows up to time trec (or count rows) as name: array
+        parts = []
+        taken = 0
+        while not self.done:
+            times = self.block['time']
+            if trec is not None:
+                end = max(int(np.searchsorted(times, trec, 'right')), self.pos)
+            else:
+                end = min(len(times), self.pos+count-taken)
+            if end > self.pos:
+                parts.append(dict([(name, values[self.pos:end]) for name, values in self.block.items()]))
+                taken += end-self.pos
+            if end < len(times):
+                self.pos = end
+                break
+            self.next_block()
+        self.rows += taken
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return None
+        return dict([(name, np.concatenate([part[name] for part in parts])) for name in self.names])
+
+
+class driver_Replay(driver_base):
+    name = 'Replay'
+
+    def __init__(self, config):
+        if isinstance(config['dev_port'], list):
+            self.filenames = list(config['dev_port'])
+        else:
+            self.filenames = [config['dev_port']]
+        driver_base.__init__(self, config, len(self.filenames))
+        self.files = []
+        if 'dev_layout' in config:
+            self.driver = config['dev_layout']
+        else:
+            self.driver = ''
+        if 'dev_column' in config:
+            self.column = config['dev_column']
+        else:
+            self.column = ''
+        if 'dev_speed' in config:
+            self.speed = config['dev_speed']
+        else:
+            self.speed = 1.0
+        if 'dev_block' in config:
+            self.block = config['dev_block']
+        else:
+            self.block = 1000
+        if 'dev_timestamps' in config:
+            self.timestamps = config['dev_timestamps']
+        else:
+            self.timestamps = 'replay'
+        if 'dev_loop' in config:
+            self.loop = config['dev_loop']
+        else:
+            self.loop = False
+        self.columns = [] # per channel: index of the shown column
+        self.tbase = [] # per channel: wall time of t0
+        self.value = [float('nan') for filename in self.filenames]
+        self.open(config)
+
+
+    def connect(self, config):
+        self.poolport = self.filenames[0]
+        self.files = [replay_file(filename, self.driver) for filename in self.filenames]
+
+
+    def setup(self, config):
+        for replay in self.files:
+            if self.column in replay.names:
+                self.columns.append(replay.names.index(self.column))
+            else:
+                numbers = [idx for idx, column in enumerate(replay.layout) if idx > 0 and column[2] == 'f']
+                self.columns.append(numbers[0])
+        # all files start at the earliest recorded time
+        t0s = [replay.t0 for replay in self.files if replay.t0 is not None]
+        for replay in self.files:
+            if t0s:
+                replay.t0 = min(t0s)
+        self.tbase = [None for replay in self.files]
+
+
+    def layout(self, idx, width):
+        return self.files[idx].layout
+
+
+    def poll(self):
+        now = time.time()
+        if self.loop and all([replay.done for replay in self.files]):
+            # all files start over together, so they stay aligned
+            for idx, replay in enumerate(self.files):
+                replay.restart()
+                self.tbase[idx] = None
+        for idx, replay in enumerate(self.files):
+            if replay.done:
+                continue
+            if self.tbase[idx] is None:
+                self.tbase[idx] = now
+            if self.speed > 0:
+                block = replay.take(trec=replay.t0+(now-self.tbase[idx])*self.speed)
+            else:
+                block = replay.take(count=self.block)
+            if block is None:
+                continue
+            times = block['time']
+            if self.timestamps == 'replay' and self.speed > 0:
+                times = self.tbase[idx]+(times-replay.t0)/self.speed
+            columns = [times]+[block[name] for name in replay.names[1:]]
+            self.record_rows(idx, list(zip(*columns)))
+            values = block[replay.names[self.columns[idx]]]
+            self.value[idx] = float(values[-1])
+            self.publish_many(idx, times, values)
+
+
+    def status(self):
+        out = driver_base.status(self)
+        for replay in self.files:
+            out = '%s\n%s: %d rows%s' % (out, os.path.basename(replay.filename), replay.rows,
+                                         ' (end)' if replay.done else '')
+        return out
+
+
+    def display(self):
+        for idx, replay in enumerate(self.files):
+            if replay.done and not self.loop:
+                self.dispbuf[idx] = "%.5E (end)" % self.value[idx]
+            else:
+                self.dispbuf[idx] = "%.5E" % self.value[idx]
+            self.plotval[idx] = [self.value[idx]]
@@ -0,0 +1,111 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# instrument discovery in the background
+# the port: *IDN? map is cached on disk and only rescanned when the cache
+# is older than TTL or a refresh is requested
+# ports of configured instruments (skip) and ports with an open handle in
+# visa_pool are never probed, start the scan after the drivers connected
+
+import json
+import os
+import threading
+import time
+from . import visa_pool
+
+cachefile = os.path.join(os.path.expanduser('~'), '.EZlab_instruments.json')
+TTL = 24*60*60 # sec
+Tidn = 0.5 # timeout of a single *IDN? in sec
+
+lock = threading.Lock()
+instruments = dict() # port: IDN ('' if it did not answer)
+scanned = 0.0 # time of the last scan
+running = threading.Event()
+owner = 'discovery' # claims ports in visa_pool while probing
+skip = set() # visa_pool.port_key of the configured instruments
+
+
+def load_cache():
+    global instruments, scanned
+    try:
+        with open(cachefile, 'r') as file_r:
+            cache = json.load(file_r)
+        with lock:
+            instruments = cache['instruments']
+            scanned = cache['scanned']
+    except Exception:
+        return False
+    return (time.time()-scanned) < TTL
+
+
+def save_cache():
+    try:
+        with lock:
+            cache = dict(instruments=instruments, scanned=scanned)
+        with open(cachefile, 'w') as file_w:
+            json.dump(cache, file_w, indent=1)
+    except Exception:
+        print('Error saving instrument cache.')
+
+
+def idn(port):
+    # configured ports and ports with a handle of a driver (PortBusy) are
+    # skipped, the last known IDN is kept for them
+    if visa_pool.port_key(port) in skip:
+        return instruments.get(port, '')
+    try:
+        inst = visa_pool.open_new(port, owner)
+    except visa_pool.PortBusy:
+        return instruments.get(port, '')
+    except Exception:
+        return ''
+    try:
+        inst.timeout = Tidn*1000
+        out = inst.query('*IDN?').rstrip()
+    except Exception:
+        out = ''
+    # close the handle opened here, drivers open their own
+    visa_pool.close(port, owner)
+    return out
+
+
+def scan(callback=None):
+    global instruments, scanned
+    try:
+        found = dict()
+        for port in visa_pool.resource_manager().list_resources():
+            found[port] = idn(port)
+        with lock:
+            instruments = found
+            scanned = time.time()
+        save_cache()
+    except Exception:
+        print('Error scanning instruments.')
+    running.clear()
+    if callback is not None:
+        callback(get())
+
+
+def start(refresh=False, callback=None, ports=None):
+    # returns immediately, the scan (if any) runs in a daemon thread
+    # ports: ports of the configured instruments, not probed
+    global skip
+    if ports is not None:
+        skip = set([visa_pool.port_key(port) for port in ports])
+    if not refresh and load_cache():
+        if callback is not None:
+            callback(get())
+        return
+    if running.is_set():
+        return
+    running.set()
+    threading.Thread(target=scan, args=(callback,), daemon=True).start()
+
+
+def refresh(callback=None, ports=None):
+    start(True, callback, ports)
+
+
+def get():
+    with lock:
+        return dict(instruments)
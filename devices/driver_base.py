@@ -0,0 +1,302 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# common acquisition loop of all instrument drivers
+# a driver only provides the hooks:
+# - connect(config): open the port (self.poolport), retried with dev_retry
+# - setup(config):   configure the connected instrument (once)
+# - pending():       True when GUI commands wait (newmode != mode, ...)
+# - apply():         send the pending GUI commands, only called (with
+#                    command priority on the bus) when pending() is True
+# - poll():          get one reading, save it with record() (written in the
+#                    background by storage.writer, and to the session
+#                    file of storage.session) and hand it to
+#                    the GUI etc. with publish()
+# - display():       update dispbuf and plotval, also after an error
+# timing, saving, error handling, shutdown and port release are done here
+# long waits of a driver use self.sleep(), which returns on stop
+# setup/apply/poll hold the bus arbiter of the port, so drivers sharing a
+# bus (e.g. GPIB board) never talk at the same time
+
+from PyQt5.QtCore import QThread
+from . import visa_pool
+from . import arbiter
+from .ringbuffer import ring_buffer
+from storage import writer
+from storage import layouts
+from storage import session
+import threading
+import time
+from contextlib import nullcontext
+from .scheduler import deadline_clock
+
+
+def visa_port(config):
+    if config['dev_interface'] == 'RS232':
+        # just using COMX does not always work
+        return 'ASRL%s::INSTR' % config['dev_port'][3:]
+    elif config['dev_interface'][0:4] == 'GPIB':
+        return '%s::%s::INSTR' % (config['dev_interface'], config['dev_port'])
+    return config['dev_port']
+
+
+class driver_base(QThread):
+    # name in messages
+    name = ''
+    # a failed poll() disables the driver until restart
+    stop_on_error = True
+
+    def __init__(self, config, channels=1):
+        QThread.__init__(self)
+        self.port = config['dev_port']
+        self.retry = config['dev_retry']
+        self.Tretry = config['dev_Tretry']
+        self.Tdriver = config['dev_Tdriver']
+        self.clock = deadline_clock(self.Tdriver, config['dev_overrun'])
+        if isinstance(config['dev_savefile'], list):
+            self.savefilename = list(config['dev_savefile'])
+        else:
+            self.savefilename = [config['dev_savefile']]
+        label = config.get('dev_label', self.name)
+        if isinstance(label, list):
+            self.labels = list(label)
+        else:
+            self.labels = [label]
+        self.save = [False for i in range(channels)]
+        self.dispbuf = ['' for i in range(channels)]
+        self.plotval = [[0.0] for i in range(channels)]
+        # per channel one ring buffer of (time, values) per consumer
+        self.rings = [[] for i in range(channels)]
+        self.poolport = ''
+        self.arbiter = None
+        self.error = 0
+        self.runstate = False
+        self.ready = 0
+        # set by stop(), wakes every wait of the acquisition loop
+        self.stopevent = threading.Event()
+        # set while the acquisition loop is not running
+        self.stopped = threading.Event()
+        self.stopped.set()
+        # extra wake up calls on stop (e.g. of the asyncio engine)
+        self.wakeups = []
+        # metrics of the last poll
+        self.npoll = 0
+        self.Tpoll = 0.0
+
+
+    def open(self, config):
+        value = True
+        while value:
+            try:
+                self.connect(config)
+                print(' ... %s connected ...' % self.name)
+                value = False
+            except Exception:
+                visa_pool.close(self.poolport, self)
+                print('Serial Error %s ...' % self.name)
+                if self.retry:
+                    print(' ... trying again in a few seconds ...')
+                    time.sleep(self.Tretry)
+                    value = True
+                else:
+                    self.error = 1
+                    value = False
+        if (self.error == 0):
+            self.arbiter = arbiter.get(self.poolport)
+            try:
+                with self.arbiter.transaction(arbiter.COMMAND):
+                    self.setup(config)
+            except Exception:
+                print('Setup Error %s ...' % self.name)
+                self.error = 1
+
+
+    def check_idn(self, deviceid):
+        out = self.inst.query("*IDN?").rstrip()
+        if not (out[:len(deviceid)] == deviceid):
+            print('Error. Got IDN:',out,', expected: ',deviceid)
+            self.error = 1
+
+
+    def connect(self, config):
+        pass
+
+
+    def setup(self, config):
+        pass
+
+
+    def pending(self):
+        return False
+
+
+    def apply(self):
+        pass
+
+
+    def poll(self):
+        pass
+
+
+    def display(self):
+        pass
+
+
+    def record(self, idx, *fields):
+        self.record_rows(idx, [fields])
+
+
+    def label(self, idx):
+        if idx < len(self.labels):
+            return self.labels[idx]
+        return '%s %d' % (self.labels[0], idx)
+
+
+    def layout(self, idx, width):
+        # columns of the rows of channel idx (storage.layouts)
+        return layouts.get(self.name, width)
+
+
+    def record_rows(self, idx, rows):
+        # queue readings (time, values ...) for the save file of channel idx
+        # and the session file (all channels, if a session is running)
+        if session.instance is not None and len(rows):
+            session.instance.add(self, idx, rows, self.layout(idx, len(rows[0])))
+        if self.save[idx] and len(rows):
+            if self.savefilename[idx] in writer.get().failed:
+                print('Error saving %s.' % self.name)
+                self.save[idx] = False
+            else:
+                writer.get().write(self.savefilename[idx], rows,
+                                   self.layout(idx, len(rows[0])), self.label(idx))
+
+
+    def subscribe(self, idx, size=4096):
+        # new consumer of channel idx, drains the returned ring buffer
+        # samples have the width of plotval[idx]
+        ring = ring_buffer(len(self.plotval[idx]), size)
+        self.rings[idx].append(ring)
+        return ring
+
+
+    def publish(self, idx, readtime, values):
+        for ring in self.rings[idx]:
+            ring.put(readtime, values)
+
+
+    def publish_many(self, idx, readtimes, values):
+        for ring in self.rings[idx]:
+            ring.put_many(readtimes, values)
+
+
+    def latency(self):
+        # max age in s of readings when they are recorded
+        return self.Tdriver+self.Tpoll
+
+
+    def status(self):
+        out = '%s\npoll %.1f ms, %d polls' % (self.clock.summary(), 1000*self.Tpoll, self.npoll)
+        if self.arbiter is not None:
+            out = out+'\n'+self.arbiter.summary()
+        return out
+
+
+    def transaction(self, priority):
+        # bus transaction, none for drivers without a port (not open()ed)
+        if self.arbiter is None:
+            return nullcontext()
+        return self.arbiter.transaction(priority)
+
+
+    def sleep(self, t):
+        # interruptible sleep, True if stopped meanwhile
+        return self.stopevent.wait(t)
+
+
+    def idle(self, t, priority=arbiter.COMMAND):
+        # sleep() inside a hook with the bus free for the other instruments
+        # (settling, sweeps, buffer fills), the bus is taken back after
+        if self.arbiter is None:
+            return self.sleep(t)
+        self.arbiter.release()
+        try:
+            return self.sleep(t)
+        finally:
+            self.arbiter.acquire(priority)
+
+
+    def begin(self):
+        # mark the loop as running before it is started, so an early
+        # stop() is not lost
+        self.runstate=True
+        self.stopevent.clear()
+        self.stopped.clear()
+        self.clock.start()
+
+
+    def end(self):
+        self.ready = 0
+        self.stopped.set()
+
+
+    def start(self):
+        self.begin()
+        QThread.start(self)
+
+
+    def request_stop(self):
+        # ask the loop to stop, returns immediately
+        self.runstate=False
+        self.stopevent.set()
+        for wakeup in self.wakeups:
+            wakeup()
+
+
+    def stop(self, timeout=None):
+        # returns False if the loop is still busy after timeout s, the
+        # port is not released then
+        self.request_stop()
+        if not self.stopped.wait(timeout):
+            print(' ... %s did not stop within %g s' % (self.name, timeout))
+            return False
+        if self.isRunning():
+            # run() is about to return
+            QThread.wait(self)
+        visa_pool.release(self.poolport, self)
+        return True
+
+
+    def __del__(self):
+        if not self.stopped.is_set():
+            self.stop()
+            self.wait()
+
+
+    def step(self):
+        # one cycle of the acquisition loop, without the wait
+        if (self.error == 0):
+            tstart = time.monotonic()
+            try:
+                # GUI commands first, the poll waits behind other commands
+                if self.pending():
+                    with self.transaction(arbiter.COMMAND):
+                        self.apply()
+                with self.transaction(arbiter.POLL):
+                    self.poll()
+            except Exception:
+                print('Connection to %s lost.' % self.name)
+                if self.stop_on_error:
+                    self.error = 1
+            self.Tpoll = time.monotonic()-tstart
+            self.npoll += 1
+        self.display()
+
+
+    def run(self):
+        try:
+            while self.runstate:
+                self.step()
+                self.ready = 1
+                self.clock.wait(self.stopevent)
+        finally:
+            self.end()
@@ -0,0 +1,100 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# optional acquisition engine: the loops of all drivers run as coroutines
+# on one asyncio event loop instead of one QThread per instrument
+# - the blocking driver hooks (apply/poll via driver.step) run on a bounded
+#   thread pool, at most `workers` instrument transactions at the same time
+# - waiting for the next cycle costs no thread, only a timer of the loop
+# - drivers are stopped as before with driver.stop()
+# - hooks must not wait long (settling, lamp lock, ...): a waiting hook
+#   holds one of the workers, use a deadline checked in pending()
+# - stop() cancels the loops without waiting for hooks still running (a
+#   driver that overran EZlabTshutdown), such a driver ends when its hook
+#   returns
+# enabled with EZlabengine = 'asyncio' in config.config
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class engine():
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self.loop = None
+        self.thread = None
+        self.executor = None
+        self.steps = set() # driver.step running or queued in the pool
+
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix='EZlab-io')
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.thread = threading.Thread(target=self.run_loop, args=(started,),
+                                       name='EZlab-engine', daemon=True)
+        self.thread.start()
+        started.wait()
+
+
+    def run_loop(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set)
+        self.loop.run_forever()
+
+
+    def add(self, driver):
+        # replaces driver.start()
+        driver.begin()
+        return asyncio.run_coroutine_threadsafe(self.acquire(driver), self.loop)
+
+
+    async def acquire(self, driver):
+        # driver.stop() ends the wait for the next cycle right away
+        wake = asyncio.Event()
+        wakeup = lambda: self.loop.call_soon_threadsafe(wake.set)
+        driver.wakeups.append(wakeup)
+        step = None
+        try:
+            while driver.runstate:
+                step = self.executor.submit(driver.step)
+                self.steps.add(step)
+                step.add_done_callback(self.steps.discard)
+                await asyncio.wrap_future(step)
+                driver.ready = 1
+                delay = driver.clock.delay()
+                if delay is not None and driver.runstate:
+                    try:
+                        await asyncio.wait_for(wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        driver.clock.woke()
+        finally:
+            driver.wakeups.remove(wakeup)
+            if step is None:
+                driver.end()
+            else:
+                # right away, or when a hook still running returns
+                step.add_done_callback(lambda step: driver.end())
+
+
+    async def cancel(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+
+    def stop(self):
+        # call after the drivers were stopped (driver.stop()), returns
+        # without waiting for hooks still running
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.cancel(), self.loop)
+            self.thread.join()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if not self.steps:
+                self.loop.close()
+            self.loop = None
@@ -0,0 +1,115 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# single producer / single consumer ring buffer of (time, values) samples
+# - preallocated arrays, nothing is allocated per sample
+# - no lock: only the producer (driver thread) moves head, only the
+#   consumer (e.g. GUI) moves tail, a sample is written before head is
+#   advanced, so the consumer never sees a half written sample
+# - a full buffer drops the new samples and counts them in dropped
+
+import numpy as np
+
+
+class ring_buffer():
+
+    def __init__(self, width=1, size=4096):
+        self.size = size
+        self.width = width
+        self.time = np.zeros(size)
+        self.data = np.zeros((size, width))
+        self.head = 0 # samples written, producer only
+        self.tail = 0 # samples read, consumer only
+        self.dropped = 0
+
+
+    def __len__(self):
+        return self.head-self.tail
+
+
+    def put(self, t, values):
+        head = self.head
+        if head-self.tail >= self.size:
+            self.dropped += 1
+            return False
+        idx = head % self.size
+        self.time[idx] = t
+        self.data[idx] = values
+        self.head = head+1
+        return True
+
+
+    def put_many(self, times, values):
+        # values: one row of width values per time
+        head = self.head
+        count = min(len(times), self.size-(head-self.tail))
+        self.dropped += len(times)-count
+        if count <= 0:
+            return 0
+        values = np.reshape(values, (-1, self.width))
+        idx = head % self.size
+        first = min(count, self.size-idx)
+        self.time[idx:idx+first] = times[:first]
+        self.data[idx:idx+first] = values[:first]
+        if count > first:
+            self.time[:count-first] = times[first:count]
+            self.data[:count-first] = values[first:count]
+        self.head = head+count
+        return count
+
+
+    def get(self):
+        # all pending samples as (times, values) copies, one batch
+        tail = self.tail
+        count = self.head-tail
+        idx = tail % self.size
+        if idx+count <= self.size:
+            times = self.time[idx:idx+count].copy()
+            values = self.data[idx:idx+count].copy()
+        else:
+            first = self.size-idx
+            times = np.concatenate((self.time[idx:], self.time[:count-first]))
+            values = np.concatenate((self.data[idx:], self.data[:count-first]))
+        self.tail = tail+count
+        return times, values
+
+
+# history of the last size samples for plotting (GUI thread only)
+# - preallocated, every sample is written twice (at i and i+size), so the
+#   last n samples are always one contiguous slice: view() returns numpy
+#   views without copying, adding a sample is O(1) whatever the size
+# - values are stored per column, so each series is contiguous as well
+class history_buffer():
+
+    def __init__(self, width=1, size=1000):
+        self.size = size
+        self.width = width
+        self.time = np.zeros(2*size)
+        self.data = np.zeros((width, 2*size))
+        self.count = 0 # samples added
+
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+
+    def put_many(self, times, values):
+        # values: one row of width values per time
+        values = np.reshape(values, (-1, self.width))
+        if len(times) > self.size:
+            times = times[-self.size:]
+            values = values[-self.size:]
+        idx = (self.count+np.arange(len(times))) % self.size
+        self.time[idx] = times
+        self.time[idx+self.size] = times
+        self.data[:, idx] = values.T
+        self.data[:, idx+self.size] = values.T
+        self.count += len(times)
+
+
+    def view(self):
+        # (times, values per column) of the kept samples, oldest first,
+        # views
+        end = (self.count-1) % self.size+1+self.size
+        start = end-len(self)
+        return self.time[start:end], self.data[:, start:end]
@@ -0,0 +1,81 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# fixed rate timing of the driver loops on the monotonic clock
+# the loop fires at start + n*period, so the time spent querying the
+# instrument does not add to the period and nothing drifts
+# overrun (loop took longer than the period):
+# - 'skip': missed targets are dropped, continue at the next one
+# - 'catchup': missed targets run back-to-back without sleeping
+
+import time
+
+class deadline_clock():
+
+    def __init__(self, period, overrun='skip'):
+        self.period = period
+        self.overrun = overrun
+        self.target = None
+        self.ticks = 0
+        self.missed = 0
+        self.jittersum = 0.0
+        self.jittermax = 0.0
+
+
+    def start(self):
+        self.target = time.monotonic()
+
+
+    def delay(self):
+        # advance to the next target, returns the time left until then
+        # or None if the loop is late and catches up without sleeping
+        if self.target is None:
+            self.start()
+        self.target = self.target+self.period
+        now = time.monotonic()
+        if now > self.target:
+            missed = int((now-self.target)/self.period)
+            if self.overrun == 'skip':
+                # jump to the next target in the future
+                self.missed = self.missed+missed+1
+                self.target = self.target+(missed+1)*self.period
+            else:
+                # run now, the late targets follow without sleep
+                self.missed = self.missed+1
+                return None
+        return self.target-now
+
+
+    def woke(self):
+        jitter = time.monotonic()-self.target
+        self.ticks = self.ticks+1
+        self.jittersum = self.jittersum+jitter
+        if jitter > self.jittermax:
+            self.jittermax = jitter
+
+
+    def wait(self, event=None):
+        # returns early if event is set (e.g. on stop)
+        delay = self.delay()
+        if delay is not None:
+            if event is None:
+                time.sleep(delay)
+            elif event.wait(delay):
+                return
+            self.woke()
+
+
+    def stats(self):
+        if self.ticks:
+            jittermean = self.jittersum/self.ticks
+        else:
+            jittermean = 0.0
+        return dict(ticks=self.ticks, missed=self.missed,
+                    jittermean=jittermean, jittermax=self.jittermax)
+
+
+    def summary(self):
+        stats = self.stats()
+        return 'period %g s, jitter mean %.1f ms, max %.1f ms, missed %d' % (
+            self.period, 1000*stats['jittermean'], 1000*stats['jittermax'],
+            stats['missed'])
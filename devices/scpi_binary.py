@@ -0,0 +1,57 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# shared reply decoding for the Keithley drivers
+# binary: IEEE 488.2 block of 32 bit floats, decoded by pyvisa
+#         (query_binary_values), GPIB only: the 2000, 2182A and 2400 reply
+#         in ASCII over RS-232
+# ascii: comma separated readings, one float() each (as fast as numpy's
+#        parsers, see benchmarks/bench_scpi_transfer.py, and no array for
+#        single readings)
+
+import numpy as np
+
+# commands switching the reply format to little endian 32 bit floats
+# the 2100 only answers in ASCII
+binformat = {
+    'K2000': [':FORMat:DATA SREal', ':FORMat:BORDer SWAPped'],
+    'K2182A': [':FORMat:DATA SREal', ':FORMat:BORDer SWAPped'],
+    'K2400': [':FORMat:DATA REAL,32', ':FORMat:BORDer SWAPped'],
+    'K2100': [],
+}
+
+asciiformat = {
+    'K2000': [':FORMat:DATA ASCii'],
+    'K2182A': [':FORMat:DATA ASCii'],
+    'K2400': [':FORMat:DATA ASCii'],
+    'K2100': [],
+}
+
+
+def set_format(inst, driver, binary, interface=''):
+    # returns True if the instrument now replies with binary blocks
+    if binary and interface == 'RS232':
+        print(' ... %s: binary replies need GPIB, using ASCII' % driver)
+        binary = False
+    if binary and len(binformat[driver]):
+        for cmd in binformat[driver]:
+            inst.write(cmd)
+        return True
+    for cmd in asciiformat[driver]:
+        inst.write(cmd)
+    return False
+
+
+def query_values(inst, q, binary, points=0):
+    # points: number of expected values, needed to read a '#0' block
+    # (indefinite length) which may contain termination characters
+    if binary:
+        return inst.query_binary_values(q, datatype='f', is_big_endian=False,
+                                        container=np.ndarray,
+                                        data_points=points)
+    return decode_ascii(inst.query(q))
+
+
+def decode_ascii(text):
+    # list of the readings
+    return [float(i) for i in text.strip().split(',')]
@@ -0,0 +1,23 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# shared helpers for plain pyserial instruments
+# a query returns as soon as the reply terminator (or the expected frame
+# length) arrived instead of sleeping a fixed time and reading in_waiting
+
+def ser_query(ser, q, term=b'\r', size=None, timeout=1.0):
+    # drop leftovers of a previous (timed out) reply
+    ser.reset_input_buffer()
+    ser.write(str.encode('%s\r' % q))
+    return ser_read(ser, term, size, timeout)
+
+
+def ser_read(ser, term=b'\r', size=None, timeout=1.0):
+    # timeout is the deadline for the whole reply, a truncated reply is
+    # returned as is and left to the caller to reject
+    ser.timeout = timeout
+    if term is None:
+        out = ser.read(size)
+    else:
+        out = ser.read_until(term, size)
+    return out.decode('ASCII').rstrip()
@@ -0,0 +1,130 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# process wide connection registry
+# - one pyvisa ResourceManager per backend
+# - open VISA resources and pyserial ports keyed by port, serial ports under
+#   one key for both ('COM3' of pyserial and 'ASRL3::INSTR' of VISA)
+# - a port is claimed by one driver at a time
+# - released ports stay open, a restarted driver gets the same handle
+
+import threading
+
+lock = threading.RLock()
+managers = dict()
+resources = dict() # port: dict(inst, owner)
+
+
+class PortBusy(Exception):
+    pass
+
+
+def port_key(port):
+    # serial ports in VISA form: COM3 -> ASRL3::INSTR,
+    # /dev/ttyUSB0 -> ASRL/dev/ttyUSB0::INSTR
+    if port[0:3] == 'COM' and port[3:].isdigit():
+        return 'ASRL%s::INSTR' % port[3:]
+    if port[0:5] == '/dev/':
+        return 'ASRL%s::INSTR' % port
+    return port
+
+
+def resource_manager(backend=''):
+    with lock:
+        if backend not in managers:
+            import pyvisa
+            managers[backend] = pyvisa.ResourceManager(backend)
+        return managers[backend]
+
+
+def claim(port, owner, kind):
+    # returns the cached handle or None
+    key = port_key(port)
+    if key not in resources:
+        return None
+    if resources[key]['owner'] not in [None, owner]:
+        raise PortBusy('%s is already in use' % port)
+    if resources[key]['kind'] != kind:
+        # released handle of the other kind (VISA/pyserial), open anew
+        try:
+            resources[key]['inst'].close()
+        except Exception:
+            pass
+        del resources[key]
+        return None
+    resources[key]['owner'] = owner
+    return resources[key]['inst']
+
+
+def open_resource(port, owner, backend=''):
+    with lock:
+        inst = claim(port, owner, 'visa')
+        if inst is None:
+            inst = resource_manager(backend).open_resource(port)
+            resources[port_key(port)] = dict(inst=inst, owner=owner, kind='visa')
+        return inst
+
+
+def open_new(port, owner, backend=''):
+    # like open_resource, but never takes over a handle of a driver, also
+    # not a released one (e.g. for probing)
+    with lock:
+        if port_key(port) in resources:
+            raise PortBusy('%s is already in use' % port)
+        return open_resource(port, owner, backend)
+
+
+def open_serial(port, owner, baudrate):
+    with lock:
+        ser = claim(port, owner, 'serial')
+        if ser is None:
+            import serial
+            ser = serial.Serial(port=port, baudrate=baudrate)
+            resources[port_key(port)] = dict(inst=ser, owner=owner, kind='serial')
+        else:
+            ser.baudrate = baudrate
+            if not ser.isOpen():
+                ser.open()
+        return ser
+
+
+def release(port, owner):
+    # give the port back but keep it open
+    with lock:
+        key = port_key(port)
+        if key in resources and resources[key]['owner'] is owner:
+            resources[key]['owner'] = None
+
+
+def close(port, owner=None):
+    # close and forget a (broken) handle, the next open starts fresh
+    with lock:
+        key = port_key(port)
+        if key in resources and resources[key]['owner'] in [None, owner]:
+            try:
+                resources[key]['inst'].close()
+            except Exception:
+                pass
+            del resources[key]
+
+
+def close_released():
+    # close the ports nobody holds, a driver still busy keeps its port
+    with lock:
+        for port in list(resources.keys()):
+            if resources[port]['owner'] is None:
+                try:
+                    resources[port]['inst'].close()
+                except Exception:
+                    pass
+                del resources[port]
+
+
+def close_all():
+    with lock:
+        for port in list(resources.keys()):
+            try:
+                resources[port]['inst'].close()
+            except Exception:
+                pass
+            del resources[port]
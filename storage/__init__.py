@@ -0,0 +1,4 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# storage of the acquired data, off the acquisition threads
@@ -0,0 +1,214 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# append-only binary recording format (.ezb)
+#
+# file header:  b'EZB1', uint32 n, n bytes JSON
+#               {"label": ..., "columns": [[name, unit, kind], ...]}
+# chunks:       b'CHNK', uint32 rows, uint32 n, n bytes JSON with the text
+#               categories new in this chunk {column index: [text, ...]}
+#               and the new channel definitions {"channels": [{...}, ...]}
+#               (session files), then rows float64 per column, column after
+#               column
+# all numbers little-endian, text columns hold the category code
+#
+# the reader maps the file and returns the columns of each chunk as numpy
+# views into the file (no copy), a chunk cut short by a crash is ignored
+# and cut off before the sink appends to the file
+
+import os
+import json
+import struct
+import time
+import numpy as np
+from . import layouts
+
+magic = b'EZB1'
+chunkmagic = b'CHNK'
+
+
+def pack_json(obj):
+    data = json.dumps(obj).encode('utf-8')
+    return struct.pack('<I', len(data))+data
+
+
+class binrec_sink():
+    # sink of storage.writer for .ezb files, collects rows and writes a
+    # chunk every Nchunk rows or Tchunk s (and on close)
+
+    def __init__(self, filename, layout, label='', Nchunk=4096, Tchunk=10.0):
+        self.filename = filename
+        self.Nchunk = Nchunk
+        self.Tchunk = Tchunk
+        self.rows = []
+        self.tchunk = time.monotonic()
+        self.categories = [] # per column: dict(text: code)
+        self.newchannels = [] # channel definitions for the next chunk
+        if os.path.isfile(filename) and os.path.getsize(filename) > 0:
+            # continue an existing file with its layout and categories
+            reader = binrec_reader(filename)
+            self.columns = reader.columns
+            for idx in range(len(self.columns)):
+                self.categories.append(dict([(text, code) for code, text in enumerate(reader.categories[idx])]))
+            end = reader.end
+            del reader
+            self.file = open(filename, 'ab')
+            # drop an incomplete last chunk (crash, power loss)
+            self.file.truncate(end)
+        else:
+            self.columns = [list(column) for column in layout]
+            self.categories = [dict() for column in self.columns]
+            self.file = open(filename, 'ab')
+            self.file.write(magic+pack_json(dict(label=label, columns=self.columns)))
+
+
+    def add_channel(self, meta):
+        self.newchannels.append(meta)
+
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.Nchunk:
+            self.write_chunk()
+
+
+    def flush(self):
+        if self.rows and time.monotonic()-self.tchunk >= self.Tchunk:
+            self.write_chunk()
+
+
+    def close(self):
+        self.write_chunk()
+        self.file.close()
+
+
+    def write_chunk(self):
+        self.tchunk = time.monotonic()
+        if not self.rows:
+            return
+        rows = self.rows
+        self.rows = []
+        data = np.full((len(self.columns), len(rows)), np.nan)
+        newcategories = dict()
+        for idx, column in enumerate(self.columns):
+            if column[2] == 't':
+                codes = self.categories[idx]
+                for rowidx, row in enumerate(rows):
+                    text = str(row[idx])
+                    if text not in codes:
+                        codes[text] = len(codes)
+                        newcategories.setdefault(idx, []).append(text)
+                    data[idx, rowidx] = codes[text]
+            else:
+                for rowidx, row in enumerate(rows):
+                    try:
+                        data[idx, rowidx] = float(row[idx])
+                    except (ValueError, TypeError, IndexError):
+                        pass
+        if self.newchannels:
+            newcategories['channels'] = self.newchannels
+            self.newchannels = []
+        self.file.write(chunkmagic+struct.pack('<I', len(rows))+pack_json(newcategories))
+        self.file.write(data.astype('<f8').tobytes())
+        self.file.flush()
+
+
+class binrec_reader():
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.map = np.memmap(filename, dtype=np.uint8, mode='r')
+        if bytes(self.map[:4]) != magic:
+            raise ValueError('%s is not an EZlab binary recording' % filename)
+        header, offset = self.read_json(4)
+        self.label = header['label']
+        self.columns = header['columns']
+        self.names = [column[0] for column in self.columns]
+        self.categories = [[] for column in self.columns]
+        self.channels = [] # channel definitions of session files
+        self.chunks = [] # (offset of the data, rows)
+        self.end = offset # end of the last complete chunk
+        while offset+12 <= len(self.map) and bytes(self.map[offset:offset+4]) == chunkmagic:
+            rows = struct.unpack('<I', bytes(self.map[offset+4:offset+8]))[0]
+            try:
+                newcategories, dataoffset = self.read_json(offset+8)
+            except ValueError:
+                break
+            end = dataoffset+8*rows*len(self.columns)
+            if end > len(self.map):
+                break
+            self.channels.extend(newcategories.pop('channels', []))
+            for idx, texts in newcategories.items():
+                self.categories[int(idx)].extend(texts)
+            self.chunks.append((dataoffset, rows))
+            offset = end
+            self.end = end
+
+
+    def read_json(self, offset):
+        size = struct.unpack('<I', bytes(self.map[offset:offset+4]))[0]
+        if offset+4+size > len(self.map):
+            raise ValueError('incomplete header')
+        return json.loads(bytes(self.map[offset+4:offset+4+size]).decode('utf-8')), offset+4+size
+
+
+    def __len__(self):
+        return sum([rows for dataoffset, rows in self.chunks])
+
+
+    def chunk(self, chunkidx):
+        # dict name: float64 view into the file
+        dataoffset, rows = self.chunks[chunkidx]
+        block = np.ndarray((len(self.columns), rows), dtype='<f8',
+                           buffer=self.map, offset=dataoffset)
+        return dict(zip(self.names, block))
+
+
+    def column(self, name):
+        # whole column, a view for single chunk files, else joined (copy)
+        views = [self.chunk(chunkidx)[name] for chunkidx in range(len(self.chunks))]
+        if len(views) == 1:
+            return views[0]
+        if len(views) == 0:
+            return np.zeros(0)
+        return np.concatenate(views)
+
+
+    def text(self, name):
+        # decoded text column
+        idx = self.names.index(name)
+        return [self.categories[idx][int(code)] for code in self.column(name)]
+
+
+def csv_to_binrec(csvfile, binfile, driver='', label=''):
+    # convert a save file of a driver (layouts.layouts) to .ezb
+    sink = None
+    rows = []
+    with open(csvfile, 'r') as file_r:
+        for line in file_r:
+            row = line.rstrip('\n').split(',')
+            if sink is None:
+                sink = binrec_sink(binfile, layouts.get(driver, len(row)), label)
+            rows.append(row)
+            if len(rows) >= sink.Nchunk:
+                sink.write(rows)
+                rows = []
+    if sink is not None:
+        sink.write(rows)
+        sink.close()
+
+
+def binrec_to_csv(binfile, csvfile):
+    # convert .ezb back to the CSV layout of the driver
+    reader = binrec_reader(binfile)
+    with open(csvfile, 'a') as file_a:
+        for chunkidx in range(len(reader.chunks)):
+            block = reader.chunk(chunkidx)
+            columns = []
+            for idx, name in enumerate(reader.names):
+                if reader.columns[idx][2] == 't':
+                    columns.append([reader.categories[idx][int(code)] for code in block[name]])
+                else:
+                    columns.append([repr(float(value)) for value in block[name]])
+            for row in zip(*columns):
+                file_a.write(','.join(row)+'\n')
@@ -0,0 +1,125 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# streaming loader of CSV save files into numpy arrays
+# - the column layout is the one of the driver (layouts), chosen by the
+#   number of fields of the first row
+# - the file is read in chunks of about Nbytes, each chunk is returned as
+#   dict name: array (float64 for numbers, str for text columns), so
+#   memory stays bounded for files of any size
+# - rows are in time order, the start and end of a time range are found by
+#   binary search on the file offsets, only the rows of the range are read
+# - rows with a different number of fields (e.g. cut short by a crash) are
+#   skipped, numbers that do not parse (e.g. '>25.0' of old RHUSB files)
+#   are read without the extra characters or as nan
+
+import os
+import numpy as np
+from . import layouts
+
+
+def read_time(line):
+    try:
+        return float(line.split(b',', 1)[0])
+    except ValueError:
+        return float('-inf')
+
+
+def to_float(column):
+    try:
+        return np.array(column, dtype=np.float64)
+    except ValueError:
+        values = np.full(len(column), np.nan)
+        for idx, value in enumerate(column):
+            try:
+                values[idx] = float(value.strip().strip('<>'))
+            except ValueError:
+                pass
+        return values
+
+
+class csv_loader():
+
+    def __init__(self, filename, driver='', Nbytes=8*1024*1024):
+        self.filename = filename
+        self.Nbytes = Nbytes
+        self.size = os.path.getsize(filename)
+        with open(filename, 'rb') as file_r:
+            first = file_r.readline().decode('utf-8', 'replace').rstrip('\r\n')
+        self.layout = layouts.get(driver, len(first.split(',')))
+        self.names = [column[0] for column in self.layout]
+
+
+    def seek_time(self, file_r, tstart):
+        # offset of the first row with time >= tstart
+        lo = 0 # start of a row, all rows before are older
+        hi = self.size
+        while hi-lo > 65536:
+            mid = (lo+hi)//2
+            file_r.seek(mid)
+            file_r.readline()
+            offset = file_r.tell()
+            line = file_r.readline()
+            if line and read_time(line) < tstart:
+                lo = offset+len(line)
+            else:
+                hi = mid
+        file_r.seek(lo)
+        while True:
+            offset = file_r.tell()
+            line = file_r.readline()
+            if not line or read_time(line) >= tstart:
+                return offset
+
+
+    def parse(self, lines):
+        width = len(self.layout)
+        rows = [line.decode('utf-8', 'replace').rstrip('\r\n').split(',') for line in lines]
+        rows = [row for row in rows if len(row) == width]
+        block = dict()
+        if not rows:
+            for name, unit, kind in self.layout:
+                block[name] = np.zeros(0, dtype=np.float64 if kind == 'f' else str)
+            return block
+        for (name, unit, kind), column in zip(self.layout, zip(*rows)):
+            if kind == 'f':
+                block[name] = to_float(column)
+            else:
+                block[name] = np.array(column, dtype=str)
+        return block
+
+
+    def chunks(self, tstart=None, tend=None):
+        # blocks of the rows with tstart <= time < tend
+        with open(self.filename, 'rb') as file_r:
+            end = self.size
+            if tend is not None:
+                end = self.seek_time(file_r, tend)
+            start = 0
+            if tstart is not None:
+                start = self.seek_time(file_r, tstart)
+            file_r.seek(start)
+            while start < end:
+                data = file_r.read(min(self.Nbytes, end-start))
+                if not data:
+                    return
+                if start+len(data) < end:
+                    # whole rows only, the rest is read with the next block
+                    cut = data.rfind(b'\n')+1
+                    if cut == 0:
+                        data += file_r.readline()
+                        cut = len(data)
+                    data = data[:cut]
+                start += len(data)
+                file_r.seek(start)
+                yield self.parse(data.splitlines())
+
+
+    def load(self, tstart=None, tend=None):
+        # all rows of the range in one dict name: array
+        blocks = list(self.chunks(tstart, tend))
+        if len(blocks) == 1:
+            return blocks[0]
+        if not blocks:
+            return self.parse([])
+        return dict([(name, np.concatenate([block[name] for block in blocks])) for name in self.names])
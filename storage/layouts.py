@@ -0,0 +1,39 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# column layouts of the save files, one row per record() of a driver
+# (name, unit, kind), kind 'f': number, 't': text
+# text columns are stored as category codes in binary files
+
+time = ('time', 's', 'f')
+
+layouts = dict()
+layouts['K2000'] = [[time, ('value', '', 'f'), ('unit', '', 't')]]
+layouts['K2100'] = layouts['K2000']
+layouts['K2182A'] = [[time, ('voltage', 'V', 'f')]]
+layouts['K2400'] = [[time, ('voltage', 'V', 'f'), ('current', 'A', 'f')]]
+layouts['K2400 sweep'] = layouts['K2400']
+layouts['PTC10'] = [[time, ('value', '', 'f')]]
+layouts['RHUSB'] = [[time, ('humidity', '%RH', 'f'), ('temperature', '°C', 'f')]]
+layouts['SPERSCI80005'] = [[time, ('value', '', 'f'), ('unit', '', 't'),
+                            ('secondary', '', 'f'), ('secondary unit', '', 't')]]
+# data frames of flow controller, flow meter and pressure controller
+layouts['Alicat'] = [[time, ('id', '', 't'), ('pressure', 'PSIA', 'f'),
+                      ('temperature', '°C', 'f'), ('volumetric_flow', 'ccm', 'f'),
+                      ('mass_flow', 'sccm', 'f'), ('setpoint', 'sccm', 'f'),
+                      ('gas', '', 't')],
+                     [time, ('id', '', 't'), ('pressure', 'PSIA', 'f'),
+                      ('temperature', '°C', 'f'), ('volumetric_flow', 'ccm', 'f'),
+                      ('mass_flow', 'sccm', 'f'), ('gas', '', 't')],
+                     [time, ('id', '', 't'), ('pressure', 'PSIA', 'f'),
+                      ('setpoint', 'PSIA', 'f')]]
+
+
+def get(driver, width):
+    # layout of a driver for rows of width columns
+    if driver in layouts:
+        for layout in layouts[driver]:
+            if len(layout) == width:
+                return layout
+    # unknown: time and numbers
+    return [time]+[('col%d' % i, '', 'f') for i in range(1, width)]
@@ -0,0 +1,153 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# rollup tiers of a save file for overviews of long runs
+# - per tier (e.g. 1 s, 1 min, 1 h) one file next to the save file
+#   (CellVoltage.csv: CellVoltage_1s.csv, CellVoltage_60s.csv, ...) with one
+#   row per bucket: start time, rows, min/max/mean of every number column
+# - updated as the rows are written: a closed bucket of a tier is written
+#   and merged into the next coarser tier, so every row is added once
+# - text columns are not rolled up, the save file keeps all raw rows
+# - rows older than the open bucket are merged into it, buckets still open
+#   on exit are written as they are (a restart may repeat their start time)
+
+import math
+import os
+
+# default bucket lengths in s
+tiers = [1.0, 60.0, 3600.0]
+
+
+def tier_filename(filename, Tbucket):
+    stem, ext = os.path.splitext(filename)
+    return '%s_%gs%s' % (stem, Tbucket, ext)
+
+
+def tier_layout(layout):
+    out = [('time', 's', 'f'), ('count', '', 'f')]
+    for name, unit, kind in layout[1:]:
+        if kind == 'f':
+            out.extend([(name+'_min', unit, 'f'), (name+'_max', unit, 'f'),
+                        (name+'_mean', unit, 'f')])
+    return out
+
+
+def pick(filename, tstart, tend, points=2000, Traw=None, Tbuckets=None):
+    # file with the finest resolution that has at most points rows between
+    # tstart and tend, the save file itself if its rows (one per Traw s)
+    # are few enough
+    if Tbuckets is None:
+        Tbuckets = tiers
+    if Traw is not None and tend-tstart <= points*Traw:
+        return filename
+    for Tbucket in sorted(Tbuckets):
+        if tend-tstart <= points*Tbucket:
+            return tier_filename(filename, Tbucket)
+    return tier_filename(filename, max(Tbuckets))
+
+
+class bucket():
+
+    def __init__(self, tstart, count, mins, maxs, sums, ns):
+        self.tstart = tstart
+        self.count = count
+        self.mins = mins
+        self.maxs = maxs
+        self.sums = sums
+        self.ns = ns # numbers per column (nan not counted)
+
+
+    def merge(self, other):
+        self.count += other.count
+        for idx in range(len(self.mins)):
+            self.mins[idx] = min(self.mins[idx], other.mins[idx])
+            self.maxs[idx] = max(self.maxs[idx], other.maxs[idx])
+            self.sums[idx] += other.sums[idx]
+            self.ns[idx] += other.ns[idx]
+
+
+    def row(self):
+        row = [self.tstart, self.count]
+        for idx in range(len(self.mins)):
+            if self.ns[idx]:
+                row.extend([self.mins[idx], self.maxs[idx], self.sums[idx]/self.ns[idx]])
+            else:
+                row.extend([math.nan, math.nan, math.nan])
+        return row
+
+
+class rollup():
+
+    def __init__(self, filename, layout, Tbuckets, open_sink):
+        self.columns = [idx for idx, column in enumerate(layout) if idx > 0 and column[2] == 'f']
+        self.Tbuckets = sorted(Tbuckets)
+        self.buckets = [None for Tbucket in self.Tbuckets] # open bucket per tier
+        self.rows = [[] for Tbucket in self.Tbuckets] # closed, not written yet
+        layout = tier_layout(layout)
+        self.sinks = [open_sink(tier_filename(filename, Tbucket), layout) for Tbucket in self.Tbuckets]
+
+
+    def add(self, rows):
+        width = len(self.columns)
+        for row in rows:
+            try:
+                readtime = float(row[0])
+            except (ValueError, TypeError, IndexError):
+                continue
+            mins = [math.inf]*width
+            maxs = [-math.inf]*width
+            sums = [0.0]*width
+            ns = [0]*width
+            for idx, column in enumerate(self.columns):
+                try:
+                    value = float(row[column])
+                except (ValueError, TypeError, IndexError):
+                    continue
+                if value == value:
+                    mins[idx] = maxs[idx] = sums[idx] = value
+                    ns[idx] = 1
+            self.merge(0, bucket(readtime, 1, mins, maxs, sums, ns))
+        self.write()
+
+
+    def merge(self, level, part):
+        tstart = math.floor(part.tstart/self.Tbuckets[level])*self.Tbuckets[level]
+        current = self.buckets[level]
+        if current is not None and tstart > current.tstart:
+            self.emit(level)
+            current = None
+        if current is None:
+            part.tstart = tstart
+            self.buckets[level] = part
+        else:
+            current.merge(part)
+
+
+    def emit(self, level):
+        # write the open bucket of level and merge it into the next tier
+        current = self.buckets[level]
+        self.buckets[level] = None
+        self.rows[level].append(current.row())
+        if level+1 < len(self.Tbuckets):
+            self.merge(level+1, current)
+
+
+    def write(self):
+        for level, sink in enumerate(self.sinks):
+            if self.rows[level]:
+                sink.write(self.rows[level])
+                self.rows[level] = []
+
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+
+    def close(self):
+        for level in range(len(self.Tbuckets)):
+            if self.buckets[level] is not None:
+                self.emit(level)
+        self.write()
+        for sink in self.sinks:
+            sink.close()
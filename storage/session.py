@@ -0,0 +1,174 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# one session file for the samples of all instruments (.ezb, or a SQLite
+# database with .db/.sqlite, see sqlstore)
+# - every numeric column of every driver channel is a session channel with
+#   an id and metadata (device label, driver, column, unit), defined in the
+#   file before its first sample
+# - one row per value: time, channel id, value
+# - drivers add their rows under one lock into a reorder buffer, values are
+#   written in time order once they are older than Treorder s, so late
+#   deliveries (e.g. buffered readings) still end up in order
+# - Treorder is at least the configured one and grows to the largest
+#   delivery latency of the recording drivers (driver.latency(), e.g. the
+#   buffer fill time of a K2000) plus one flush
+# - values arriving after newer ones were written anyway are dropped from
+#   the session (the per-channel save files keep them), counted per
+#   channel, reported once per channel, and the window grows to cover them
+# - text columns (units, gas names) stay in the per-channel save files
+# - the sink is opened, written and closed by the session thread only
+#   (a SQLite connection must stay in its thread), if it fails the session
+#   stops taking values
+
+import heapq
+import os
+import threading
+import time
+from . import binrec
+from . import sqlstore
+
+layout = [('time', 's', 'f'), ('channel', '', 'f'), ('value', '', 'f')]
+
+# extension: sink class, default binrec
+sinktypes = dict()
+sinktypes['.db'] = sqlstore.sqlite_session_sink
+sinktypes['.sqlite'] = sqlstore.sqlite_session_sink
+
+
+class session_recorder():
+
+    def __init__(self, filename, Treorder=10.0, Tflush=1.0):
+        self.filename = filename
+        self.Treorder = Treorder
+        self.Tflush = Tflush
+        self.lock = threading.Lock()
+        self.pending = [] # heap of (time, sequence, channel id, value)
+        self.sequence = 0
+        self.channels = dict() # (driver, channel, column): channel id
+        self.newchannels = []
+        self.tlast = float('-inf')
+        self.late = 0
+        self.latechannels = dict() # channel id: late values
+        self.names = dict() # channel id: 'device column' for messages
+        self.written = 0
+        self.failed = False
+        self.sink = None
+        self.stopevent = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='EZlab-session', daemon=True)
+        self.thread.start()
+
+
+    def channel_ids(self, driver, idx, columns):
+        # [(column index, channel id)] of the numeric columns, call with lock
+        ids = []
+        for column, (name, unit, kind) in enumerate(columns):
+            if column == 0 or kind != 'f':
+                continue
+            key = (driver, idx, column)
+            if key not in self.channels:
+                self.channels[key] = len(self.channels)
+                self.newchannels.append(dict(id=self.channels[key],
+                                             device=driver.label(idx),
+                                             driver=driver.name,
+                                             column=name, unit=unit))
+                self.names[self.channels[key]] = '%s %s' % (driver.label(idx), name)
+            ids.append((column, self.channels[key]))
+        return ids
+
+
+    def add(self, driver, idx, rows, columns):
+        if self.failed:
+            return
+        # keep values as long as the driver may deliver older ones
+        Twindow = driver.latency()+self.Tflush
+        with self.lock:
+            if Twindow > self.Treorder:
+                self.Treorder = Twindow
+            ids = self.channel_ids(driver, idx, columns)
+            for row in rows:
+                readtime = float(row[0])
+                for column, channel in ids:
+                    try:
+                        value = float(row[column])
+                    except (ValueError, TypeError, IndexError):
+                        value = float('nan')
+                    heapq.heappush(self.pending, (readtime, self.sequence, channel, value))
+                    self.sequence += 1
+
+
+    def release(self, tlimit):
+        # write all values up to tlimit in time order
+        out = []
+        with self.lock:
+            while self.pending and self.pending[0][0] <= tlimit:
+                out.append(heapq.heappop(self.pending))
+            newchannels = self.newchannels
+            self.newchannels = []
+        rows = []
+        now = time.time()
+        for readtime, sequence, channel, value in out:
+            if readtime < self.tlast:
+                # arrived at most now-readtime after it was read
+                self.late += 1
+                with self.lock:
+                    self.Treorder = max(self.Treorder, now-readtime+self.Tflush)
+                if channel not in self.latechannels:
+                    self.latechannels[channel] = 0
+                    print('Session: late values of %s dropped (%.1f s behind), reorder window now %.1f s' % (
+                        self.names.get(channel, channel), self.tlast-readtime, self.Treorder))
+                self.latechannels[channel] += 1
+                continue
+            self.tlast = readtime
+            rows.append((readtime, channel, value))
+        for meta in newchannels:
+            self.sink.add_channel(meta)
+        self.sink.write(rows)
+        self.sink.flush()
+        self.written += len(rows)
+
+
+    def summary(self):
+        return 'session %s: %d channels, %d values, %d late, window %.1f s' % (
+            self.filename, len(self.channels), self.written, self.late, self.Treorder)
+
+
+    def run(self):
+        try:
+            ext = os.path.splitext(self.filename)[1].lower()
+            self.sink = sinktypes.get(ext, binrec.binrec_sink)(self.filename, layout, 'session')
+            while not self.stopevent.wait(self.Tflush):
+                self.release(time.time()-self.Treorder)
+            self.release(float('inf'))
+        except Exception as e:
+            print('Error writing session %s: %s' % (self.filename, str(e)))
+            self.failed = True
+            with self.lock:
+                self.pending = []
+        finally:
+            if self.sink is not None:
+                self.sink.close()
+
+
+    def stop(self):
+        # writes the remaining values and closes the file
+        self.stopevent.set()
+        self.thread.join()
+
+
+# one session per process, off unless started
+instance = None
+
+
+def start(filename, Treorder=10.0):
+    global instance
+    if instance is None:
+        instance = session_recorder(filename, Treorder)
+    return instance
+
+
+def stop():
+    global instance
+    if instance is not None:
+        instance.stop()
+        instance = None
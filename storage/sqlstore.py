@@ -0,0 +1,154 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# SQLite database as save file (.db, .sqlite), readable while running
+# - WAL journal: readers (sqlite_reader, other programs) never block the
+#   writer and see every committed batch
+# - one transaction with executemany per batch of the writer thread
+# - tables:
+#   channels(id, device, driver, name, unit)
+#   samples(channel, time, value, text), indexed by (channel, time),
+#   text columns of a layout (units, gas names) go to text
+# - sqlite_sink: save file of one driver channel, one channel per column of
+#   the layout (device: name of the file)
+# - sqlite_session_sink: session file (storage.session), rows
+#   (time, channel id, value) with channels from add_channel()
+# a connection is used by the thread which opened it only
+
+import os
+import sqlite3
+
+schema = '''
+CREATE TABLE IF NOT EXISTS channels (id INTEGER PRIMARY KEY, device TEXT,
+    driver TEXT, name TEXT, unit TEXT);
+CREATE TABLE IF NOT EXISTS samples (channel INTEGER, time REAL, value REAL,
+    text TEXT);
+CREATE INDEX IF NOT EXISTS samples_channel_time ON samples (channel, time);
+'''
+
+
+def connect(filename):
+    connection = sqlite3.connect(filename)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(schema)
+    return connection
+
+
+class sqlite_sink():
+
+    def __init__(self, filename, layout=None, label=''):
+        self.filename = filename
+        self.connection = connect(filename)
+        self.label = label
+        if self.label == '':
+            self.label = os.path.splitext(os.path.basename(filename))[0]
+        # column index: (channel id, kind), numeric and text columns
+        self.columns = []
+        if layout is not None:
+            for column, (name, unit, kind) in enumerate(layout):
+                if column > 0:
+                    self.columns.append((column, self.channel_id(name, unit), kind))
+
+
+    def channel_id(self, name, unit, driver=''):
+        # existing channel of this device, else a new one
+        row = self.connection.execute('SELECT id FROM channels WHERE device=? AND name=?',
+                                      (self.label, name)).fetchone()
+        if row is not None:
+            return row[0]
+        with self.connection:
+            cursor = self.connection.execute('INSERT INTO channels (device, driver, name, unit) VALUES (?, ?, ?, ?)',
+                                             (self.label, driver, name, unit))
+        return cursor.lastrowid
+
+
+    def write(self, rows):
+        samples = []
+        for row in rows:
+            readtime = float(row[0])
+            for column, channel, kind in self.columns:
+                if column >= len(row):
+                    continue
+                if kind == 't':
+                    samples.append((channel, readtime, None, str(row[column])))
+                else:
+                    try:
+                        samples.append((channel, readtime, float(row[column]), None))
+                    except (ValueError, TypeError):
+                        samples.append((channel, readtime, None, str(row[column])))
+        self.insert(samples)
+
+
+    def insert(self, samples):
+        with self.connection:
+            self.connection.executemany('INSERT INTO samples (channel, time, value, text) VALUES (?, ?, ?, ?)',
+                                        samples)
+
+
+    def flush(self):
+        # every write() is committed
+        pass
+
+
+    def close(self):
+        self.connection.close()
+
+
+class sqlite_session_sink(sqlite_sink):
+
+    def __init__(self, filename, layout=None, label='session'):
+        sqlite_sink.__init__(self, filename, None, label)
+        self.ids = dict() # session channel id: database channel id
+
+
+    def add_channel(self, meta):
+        with self.connection:
+            cursor = self.connection.execute('INSERT INTO channels (device, driver, name, unit) VALUES (?, ?, ?, ?)',
+                                             (meta['device'], meta['driver'], meta['column'], meta['unit']))
+        self.ids[meta['id']] = cursor.lastrowid
+
+
+    def write(self, rows):
+        self.insert([(self.ids[int(channel)], float(readtime), float(value), None)
+                     for readtime, channel, value in rows])
+
+
+class sqlite_reader():
+    # queries on a database in use, channel by id or (device, name)
+
+    def __init__(self, filename):
+        self.connection = sqlite3.connect('file:%s?mode=ro' % filename, uri=True)
+
+
+    def channels(self):
+        # [(id, device, driver, name, unit)]
+        return self.connection.execute('SELECT id, device, driver, name, unit FROM channels ORDER BY id').fetchall()
+
+
+    def channel_id(self, channel):
+        if isinstance(channel, tuple):
+            row = self.connection.execute('SELECT id FROM channels WHERE device=? AND name=?',
+                                          channel).fetchone()
+            if row is None:
+                raise KeyError(channel)
+            return row[0]
+        return channel
+
+
+    def range(self, channel, tstart, tend):
+        # [(time, value, text)] with tstart <= time < tend
+        return self.connection.execute('SELECT time, value, text FROM samples WHERE channel=? AND time>=? AND time<? ORDER BY time',
+                                       (self.channel_id(channel), tstart, tend)).fetchall()
+
+
+    def last(self, channel, count=1):
+        # the count newest [(time, value, text)], oldest first
+        rows = self.connection.execute('SELECT time, value, text FROM samples WHERE channel=? ORDER BY time DESC LIMIT ?',
+                                       (self.channel_id(channel), count)).fetchall()
+        rows.reverse()
+        return rows
+
+
+    def close(self):
+        self.connection.close()
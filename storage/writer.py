@@ -0,0 +1,226 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# background writer of the save files
+# - drivers hand rows to write(), which only appends them to a queue and
+#   never waits for the disk
+# - one writer thread keeps the files open, formats and writes the rows in
+#   batches and flushes every Tflush s, or earlier once Nflush rows wait
+# - the sink of a file is chosen by its extension (default: CSV text,
+#   .ezb: binary columns, see binrec, .db/.sqlite: SQLite database, see
+#   sqlstore), the column layout of the rows and the label of the channel
+#   are given with the first write()
+# - rollup tiers (min/max/mean per 1 s, 1 min, 1 h, see rollup) of every
+#   file are updated with the rows written, tiers = [] turns them off,
+#   rollup=False with the first write() for one file (e.g. sweeps, whose
+#   rows share one time)
+# - backlog (rows not written yet) and throughput (rows/s) are reported
+
+import os
+import threading
+import time
+from collections import deque
+from . import binrec
+from . import sqlstore
+from . import rollup
+from . import layouts
+
+
+class csv_sink():
+
+    def __init__(self, filename, layout=None, label=''):
+        self.file = open(filename, 'a')
+
+
+    def write(self, rows):
+        self.file.write(''.join([','.join([str(i) for i in row])+'\n' for row in rows]))
+
+
+    def flush(self):
+        self.file.flush()
+
+
+    def close(self):
+        self.file.close()
+
+
+# extension: sink class
+sinktypes = dict()
+sinktypes['.ezb'] = binrec.binrec_sink
+sinktypes['.db'] = sqlstore.sqlite_sink
+sinktypes['.sqlite'] = sqlstore.sqlite_sink
+
+
+def open_sink(filename, layout=None, label=''):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in sinktypes:
+        return sinktypes[ext](filename, layout, label)
+    return csv_sink(filename, layout, label)
+
+
+class batch_writer():
+
+    def __init__(self, Tflush=1.0, Nflush=1000, tiers=None):
+        self.Tflush = Tflush
+        self.Nflush = Nflush
+        if tiers is None:
+            tiers = rollup.tiers
+        self.tiers = tiers # bucket lengths of the rollups in s
+        self.queue = deque() # (filename, rows), (filename, None) closes
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.sinks = dict() # filename: sink
+        self.rollups = dict() # filename: rollup
+        self.layouts = dict() # filename: column layout
+        self.labels = dict() # filename: channel label
+        self.norollup = set() # filenames without rollup tiers
+        self.failed = set() # filenames that could not be written
+        self.queued = 0 # rows
+        self.written = 0 # rows
+        self.rate = 0.0 # rows/s
+        self.runstate = False
+        self.thread = None
+
+
+    def start(self):
+        self.runstate = True
+        self.thread = threading.Thread(target=self.run, name='EZlab-writer', daemon=True)
+        self.thread.start()
+
+
+    def write(self, filename, rows, layout=None, label='', rollup=True):
+        if layout is not None and filename not in self.layouts:
+            self.layouts[filename] = layout
+        if label and filename not in self.labels:
+            self.labels[filename] = label
+        if not rollup:
+            self.norollup.add(filename)
+        self.queue.append((filename, rows))
+        with self.lock:
+            self.queued += len(rows)
+            backlog = self.queued-self.written
+        if backlog >= self.Nflush:
+            self.wake.set()
+
+
+    def close(self, filename):
+        # close the file after the rows queued so far
+        self.queue.append((filename, None))
+        self.wake.set()
+
+
+    def backlog(self):
+        with self.lock:
+            return self.queued-self.written
+
+
+    def summary(self):
+        return 'writer: %d rows waiting, %.0f rows/s, %d files open' % (
+            self.backlog(), self.rate, len(self.sinks))
+
+
+    def drain(self):
+        # write everything queued so far, grouped per file
+        batches = dict()
+        while self.queue:
+            filename, rows = self.queue.popleft()
+            if rows is None:
+                self.write_batches(batches)
+                batches = dict()
+                if filename in self.sinks:
+                    self.sinks.pop(filename).close()
+                tiers = self.rollups.pop(filename, None)
+                if tiers is not None:
+                    tiers.close()
+                self.failed.discard(filename)
+            else:
+                batches.setdefault(filename, []).extend(rows)
+        self.write_batches(batches)
+        for sink in self.sinks.values():
+            sink.flush()
+        for tiers in self.rollups.values():
+            if tiers is not None:
+                tiers.flush()
+
+
+    def write_batches(self, batches):
+        for filename, rows in batches.items():
+            try:
+                if filename not in self.sinks:
+                    self.sinks[filename] = open_sink(filename, self.layouts.get(filename),
+                                                     self.labels.get(filename, ''))
+                self.sinks[filename].write(rows)
+            except Exception as e:
+                if filename not in self.failed:
+                    print('Error saving %s: %s' % (filename, str(e)))
+                self.failed.add(filename)
+            else:
+                self.write_rollup(filename, rows)
+            with self.lock:
+                self.written += len(rows)
+
+
+    def write_rollup(self, filename, rows):
+        # a failed rollup only stops the rollup, not the save file
+        if not self.tiers or filename in self.norollup or self.rollups.get(filename, True) is None:
+            return
+        try:
+            if filename not in self.rollups:
+                layout = self.layouts.get(filename)
+                if layout is None:
+                    layout = layouts.get('', len(rows[0]))
+                self.rollups[filename] = rollup.rollup(filename, layout, self.tiers, open_sink)
+            self.rollups[filename].add(rows)
+        except Exception as e:
+            print('Error in rollup of %s: %s' % (filename, str(e)))
+            self.rollups[filename] = None
+
+
+    def run(self):
+        tlast = time.monotonic()
+        writtenlast = 0
+        while self.runstate:
+            self.wake.wait(self.Tflush)
+            self.wake.clear()
+            self.drain()
+            now = time.monotonic()
+            self.rate = (self.written-writtenlast)/(now-tlast)
+            tlast = now
+            writtenlast = self.written
+        self.drain()
+        for sink in self.sinks.values():
+            sink.close()
+        self.sinks = dict()
+        for tiers in self.rollups.values():
+            if tiers is not None:
+                tiers.close()
+        self.rollups = dict()
+
+
+    def stop(self):
+        self.runstate = False
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+# one writer for the whole process, started on first use
+instance = None
+instancelock = threading.Lock()
+
+
+def get():
+    global instance
+    with instancelock:
+        if instance is None:
+            instance = batch_writer()
+            instance.start()
+        return instance
+
+
+def stop():
+    global instance
+    with instancelock:
+        if instance is not None:
+            instance.stop()
+            instance = None
@@ -0,0 +1,39 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# bus cycle of Alicat units sharing one line (devices.dev_Alicat)
+
+from devices.dev_Alicat import Alicat_bus
+
+
+class line():
+    # every unit answers with its data frame
+    def __init__(self):
+        self.sent = []
+
+    def query(self, q):
+        self.sent.append(q)
+        return q[0]+' +014.70 +025.00 +001.00 +002.00 +003.00 N2'
+
+
+def test_command_frames_are_readings():
+    units = line()
+    bus = Alicat_bus(units.query)
+    replies = bus.command(['A', 'B', 'C'], {1: ['G8', 'S3.0']})
+    frames = bus.cycle(['A', 'B', 'C'], replies)
+    # B is not polled again after its commands
+    assert units.sent == ['BG8', 'BS3.0', 'A', 'C']
+    assert [frame[1][0] for frame in frames] == ['A', 'B', 'C']
+    assert bus.cycleframes == 4
+
+
+def test_poll_cycle():
+    units = line()
+    bus = Alicat_bus(units.query)
+    bus.cycle(['A', 'B'])
+    assert units.sent == ['A', 'B']
+    assert bus.cycleframes == 2
+    assert not bus.incycle
+    # a frame of another unit is not a reading
+    bus.query = lambda q: 'X 1 2'
+    assert [frame[1] for frame in bus.cycle(['A'])] == [[]]
@@ -0,0 +1,83 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# bus arbiter (devices.arbiter)
+
+import threading
+import time
+from PyQt5.QtCore import QCoreApplication
+from devices import arbiter
+from devices.driver_base import driver_base
+
+# the drivers are QThreads
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_bus_of():
+    assert arbiter.bus_of('GPIB0::5::INSTR') == 'GPIB0'
+    assert arbiter.bus_of('COM3') == arbiter.bus_of('ASRL3::INSTR')
+    assert arbiter.get('GPIB0::5::INSTR') is arbiter.get('GPIB0::7::INSTR')
+
+
+def test_priority():
+    bus = arbiter.arbiter('test')
+    order = []
+
+    def transaction(name, priority):
+        with bus.transaction(priority):
+            order.append(name)
+
+    bus.acquire()
+    threads = [threading.Thread(target=transaction, args=('poll1', arbiter.POLL)),
+               threading.Thread(target=transaction, args=('poll2', arbiter.POLL)),
+               threading.Thread(target=transaction, args=('command', arbiter.COMMAND))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    assert bus.depth() == 3
+    bus.release()
+    for thread in threads:
+        thread.join()
+    # commands first, then in order
+    assert order == ['command', 'poll1', 'poll2']
+    assert bus.transactions == 4
+    assert bus.maxdepth == 3
+
+
+def test_utilization():
+    bus = arbiter.arbiter('test', window=1.0)
+    with bus.transaction():
+        time.sleep(0.1)
+    time.sleep(0.1)
+    assert 0.3 < bus.utilization() < 0.7
+
+
+class driver_test(driver_base):
+    name = 'test'
+
+    def __init__(self):
+        driver_base.__init__(self, dict(dev_port='TEST', dev_retry=False,
+                                        dev_Tretry=0, dev_Tdriver=1.0,
+                                        dev_overrun='skip', dev_savefile=''))
+        self.arbiter = arbiter.arbiter('test')
+
+
+def test_idle_frees_bus():
+    driver = driver_test()
+    waited = []
+
+    def settle():
+        with driver.transaction(arbiter.COMMAND):
+            waited.append(driver.idle(0.5))
+            # the bus is back before the hook goes on
+            waited.append(driver.arbiter.busy)
+
+    thread = threading.Thread(target=settle)
+    thread.start()
+    time.sleep(0.1)
+    tstart = time.monotonic()
+    with driver.arbiter.transaction(arbiter.POLL):
+        assert time.monotonic()-tstart < 0.1
+    thread.join()
+    assert waited == [False, True]
+    assert not driver.arbiter.busy
@@ -0,0 +1,13 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# smoke run of benchmarks/bench_startup.py, every case once
+
+from benchmarks import bench_startup
+
+
+def test_bench_startup(monkeypatch):
+    monkeypatch.setattr(bench_startup, 'repeat', 1)
+    # a snippet that fails raises CalledProcessError
+    for code in [bench_startup.eager, bench_startup.alldriver, bench_startup.lazy]:
+        assert bench_startup.coldstart(code) > 0
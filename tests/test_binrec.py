@@ -0,0 +1,71 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# binary recording format (storage.binrec)
+
+import os
+import numpy as np
+from storage import binrec
+from storage import writer
+
+layout = [('time', 's', 'f'), ('value', 'V', 'f'), ('unit', '', 't')]
+
+
+def write(filename, chunks, label=''):
+    sink = binrec.binrec_sink(filename, layout, label, Nchunk=2)
+    for rows in chunks:
+        sink.write(rows)
+    sink.close()
+
+
+def test_roundtrip(tmp_path):
+    filename = str(tmp_path/'a.ezb')
+    write(filename, [[(1.0, 0.5, 'VDC'), (2.0, 'x', 'VAC'), (3.0, 1.5, 'VDC')]], 'Cell')
+    reader = binrec.binrec_reader(filename)
+    assert reader.label == 'Cell'
+    assert reader.columns == [list(column) for column in layout]
+    assert len(reader) == 3
+    assert list(reader.column('time')) == [1.0, 2.0, 3.0]
+    value = reader.column('value')
+    assert value[0] == 0.5 and np.isnan(value[1]) and value[2] == 1.5
+    assert reader.text('unit') == ['VDC', 'VAC', 'VDC']
+    assert reader.end == os.path.getsize(filename)
+
+
+def test_append(tmp_path):
+    filename = str(tmp_path/'a.ezb')
+    write(filename, [[(1.0, 1.0, 'VDC'), (2.0, 2.0, 'VDC')]], 'Cell')
+    # continues with the layout and categories of the file
+    write(filename, [[(3.0, 3.0, 'VAC'), (4.0, 4.0, 'VDC')]])
+    reader = binrec.binrec_reader(filename)
+    assert reader.label == 'Cell'
+    assert list(reader.column('time')) == [1.0, 2.0, 3.0, 4.0]
+    assert reader.text('unit') == ['VDC', 'VDC', 'VAC', 'VDC']
+
+
+def test_truncated_append(tmp_path):
+    filename = str(tmp_path/'a.ezb')
+    write(filename, [[(1.0, 1.0, 'VDC'), (2.0, 2.0, 'VDC')],
+                     [(3.0, 3.0, 'VAC'), (4.0, 4.0, 'VAC')]])
+    dataoffset, rows = binrec.binrec_reader(filename).chunks[0]
+    # crash while writing the second chunk
+    os.truncate(filename, os.path.getsize(filename)-10)
+    reader = binrec.binrec_reader(filename)
+    assert len(reader) == 2
+    assert reader.end == dataoffset+8*rows*len(layout)
+    del reader
+    write(filename, [[(5.0, 5.0, 'A'), (6.0, 6.0, 'VDC')]])
+    reader = binrec.binrec_reader(filename)
+    assert reader.end == os.path.getsize(filename)
+    assert list(reader.column('time')) == [1.0, 2.0, 5.0, 6.0]
+    assert list(reader.column('value')) == [1.0, 2.0, 5.0, 6.0]
+    assert reader.text('unit') == ['VDC', 'VDC', 'A', 'VDC']
+
+
+def test_writer_label(tmp_path):
+    filename = str(tmp_path/'a.ezb')
+    batch = writer.batch_writer(tiers=[])
+    batch.start()
+    batch.write(filename, [(1.0, 1.0, 'VDC')], layout, 'Cell')
+    batch.stop()
+    assert binrec.binrec_reader(filename).label == 'Cell'
@@ -0,0 +1,48 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# CSV save file loader (storage.csvload)
+
+import numpy as np
+from storage import csvload
+
+
+def write(filename, count):
+    with open(filename, 'w') as file_w:
+        for i in range(count):
+            file_w.write('%d,%g,VDC\n' % (1000+i, 0.5*i))
+
+
+def test_load(tmp_path):
+    filename = str(tmp_path/'a.csv')
+    with open(filename, 'w') as file_w:
+        file_w.write('1,0.5,VDC\n2,>25.0,VAC\n3,x,VDC\n4,1.5\n5,2.5,VDC')
+    loader = csvload.csv_loader(filename, 'K2000')
+    assert loader.names == ['time', 'value', 'unit']
+    block = loader.load()
+    # the short row is skipped, the last row has no line end
+    assert list(block['time']) == [1.0, 2.0, 3.0, 5.0]
+    assert block['value'][:2].tolist() == [0.5, 25.0]
+    assert np.isnan(block['value'][2]) and block['value'][3] == 2.5
+    assert list(block['unit']) == ['VDC', 'VAC', 'VDC', 'VDC']
+
+
+def test_chunks(tmp_path):
+    filename = str(tmp_path/'a.csv')
+    write(filename, 1000)
+    loader = csvload.csv_loader(filename, 'K2000', Nbytes=1000)
+    blocks = list(loader.chunks())
+    assert len(blocks) > 1
+    assert np.concatenate([block['time'] for block in blocks]).tolist() == list(range(1000, 2000))
+
+
+def test_range(tmp_path):
+    filename = str(tmp_path/'a.csv')
+    # large enough for the binary search
+    write(filename, 20000)
+    loader = csvload.csv_loader(filename, 'K2000', Nbytes=4096)
+    block = loader.load(12345, 12400)
+    assert block['time'].tolist() == list(range(12345, 12400))
+    assert block['value'][0] == 0.5*11345
+    assert len(loader.load(30000)['time']) == 0
+    assert len(loader.load(None, 1010)['time']) == 10
@@ -0,0 +1,71 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# asyncio engine of the driver loops (devices.engine)
+
+import threading
+import time
+from PyQt5.QtCore import QCoreApplication
+from devices.driver_base import driver_base
+from devices.engine import engine
+
+# the drivers are QThreads
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+class driver_test(driver_base):
+    name = 'test'
+
+    def __init__(self, Tdriver):
+        driver_base.__init__(self, dict(dev_port='TEST', dev_retry=False,
+                                        dev_Tretry=0, dev_Tdriver=Tdriver,
+                                        dev_overrun='skip', dev_savefile=''))
+        self.hold = None # poll() waits for this event if set
+        self.polling = threading.Event()
+
+
+    def poll(self):
+        self.polling.set()
+        if self.hold is not None:
+            self.hold.wait()
+
+
+def test_period():
+    acq = engine(2)
+    acq.start()
+    drivers = [driver_test(0.05), driver_test(0.1)]
+    for driver in drivers:
+        acq.add(driver)
+    time.sleep(1.0)
+    for driver in drivers:
+        assert driver.stop(1.0)
+    acq.stop()
+    # first step right away, then one per period
+    assert abs(drivers[0].npoll-21) <= 2
+    assert abs(drivers[1].npoll-11) <= 2
+    assert drivers[0].clock.stats()['missed'] == 0
+
+
+def test_stop_blocked_hook():
+    acq = engine(2)
+    acq.start()
+    blocked = driver_test(0.05)
+    blocked.hold = threading.Event()
+    other = driver_test(0.05)
+    acq.add(blocked)
+    acq.add(other)
+    assert blocked.polling.wait(1.0)
+    # the blocked hook holds one worker, the other driver keeps running
+    npoll = other.npoll
+    time.sleep(0.3)
+    assert other.npoll > npoll
+    assert other.stop(1.0)
+    assert not blocked.stop(0.1)
+    tstart = time.monotonic()
+    acq.stop()
+    assert time.monotonic()-tstart < 0.5
+    assert acq.loop is None
+    # the driver ends once its hook returns
+    assert not blocked.stopped.is_set()
+    blocked.hold.set()
+    assert blocked.stopped.wait(1.0)
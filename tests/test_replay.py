@@ -0,0 +1,36 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# replay of recorded save files (devices.dev_Replay)
+
+import time
+from PyQt5.QtCore import QCoreApplication
+from devices.dev_Replay import driver_Replay
+
+# the drivers are QThreads
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def test_loop_aligned(tmp_path):
+    filenames = [str(tmp_path/'a.csv'), str(tmp_path/'b.csv')]
+    with open(filenames[0], 'w') as file_w:
+        file_w.write('100.0,1,VDC\n100.1,2,VDC\n')
+    with open(filenames[1], 'w') as file_w:
+        file_w.write('100.05,10,VDC\n100.3,20,VDC\n')
+    replay = driver_Replay(dict(dev_port=filenames, dev_retry=False, dev_Tretry=0,
+                                dev_Tdriver=0.01, dev_overrun='skip',
+                                dev_savefile=['', ''], dev_layout='K2000',
+                                dev_speed=10.0, dev_loop=True))
+    rows = [[], []]
+    replay.record_rows = lambda idx, new: rows[idx].extend(new)
+    tstart = time.time()
+    # one pass takes 0.3 s/dev_speed
+    while len(rows[1]) < 4 and time.time() < tstart+1.0:
+        replay.poll()
+        time.sleep(0.002)
+    # the second pass of both files starts together
+    assert [row[1] for row in rows[0][:4]] == [1, 2, 1, 2]
+    assert [row[1] for row in rows[1][:4]] == [10, 20, 10, 20]
+    tbase = rows[0][2][0]
+    assert abs(rows[1][2][0]-(tbase+0.05/10)) < 1e-9
+    assert abs(rows[0][0][0]-(rows[1][0][0]-0.05/10)) < 1e-9
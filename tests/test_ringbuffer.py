@@ -0,0 +1,54 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# ring and history buffers (devices.ringbuffer)
+
+import numpy as np
+from devices.ringbuffer import ring_buffer, history_buffer
+
+
+def test_ring_put_get():
+    ring = ring_buffer(2, 4)
+    assert ring.put(1.0, [1.0, 10.0])
+    assert ring.put(2.0, [2.0, 20.0])
+    assert len(ring) == 2
+    times, values = ring.get()
+    assert list(times) == [1.0, 2.0]
+    assert values.tolist() == [[1.0, 10.0], [2.0, 20.0]]
+    assert len(ring) == 0
+    assert len(ring.get()[0]) == 0
+
+
+def test_ring_full_drops():
+    ring = ring_buffer(1, 3)
+    for i in range(5):
+        ring.put(float(i), [float(i)])
+    assert ring.dropped == 2
+    assert list(ring.get()[0]) == [0.0, 1.0, 2.0]
+
+
+def test_ring_wraps():
+    ring = ring_buffer(1, 4)
+    ring.put_many(np.arange(3.0), np.arange(3.0))
+    ring.get()
+    # 3 of 5 fit, the last two samples wrap to the start
+    assert ring.put_many(np.arange(3.0, 8.0), np.arange(3.0, 8.0)) == 4
+    assert ring.dropped == 1
+    times, values = ring.get()
+    assert list(times) == [3.0, 4.0, 5.0, 6.0]
+    assert list(values[:, 0]) == [3.0, 4.0, 5.0, 6.0]
+
+
+def test_history_keeps_last():
+    history = history_buffer(2, 4)
+    assert len(history) == 0
+    history.put_many([1.0, 2.0, 3.0], [[1, 10], [2, 20], [3, 30]])
+    times, values = history.view()
+    assert list(times) == [1.0, 2.0, 3.0]
+    assert values.tolist() == [[1, 2, 3], [10, 20, 30]]
+    history.put_many(np.arange(4.0, 11.0), np.zeros((7, 2)))
+    times, values = history.view()
+    assert list(times) == [7.0, 8.0, 9.0, 10.0]
+    assert values.shape == (2, 4)
+    # views, no copy
+    assert times.base is history.time
@@ -0,0 +1,71 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# rollup tiers of the save files (storage.rollup, storage.writer)
+
+import math
+import os
+from storage import rollup
+from storage import writer
+
+layout = [('time', 's', 'f'), ('value', 'V', 'f'), ('unit', '', 't')]
+
+
+class list_sink():
+    # collects the rows of one tier
+    sinks = dict()
+
+    def __init__(self, filename, layout=None, label=''):
+        self.layout = layout
+        self.rows = []
+        self.closed = False
+        list_sink.sinks[filename] = self
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_tier_filename():
+    assert rollup.tier_filename('CellVoltage.csv', 1.0) == 'CellVoltage_1s.csv'
+    assert rollup.tier_filename('CellVoltage.csv', 60.0) == 'CellVoltage_60s.csv'
+
+
+def test_buckets():
+    list_sink.sinks = dict()
+    tiers = rollup.rollup('a.csv', layout, [1.0, 10.0], list_sink)
+    assert [column[0] for column in list_sink.sinks['a_1s.csv'].layout] == [
+        'time', 'count', 'value_min', 'value_max', 'value_mean']
+    tiers.add([(100.2, 1.0, 'V'), (100.7, 3.0, 'V'), (101.1, 'x', 'V'),
+               (102.5, 5.0, 'V'), (110.0, 7.0, 'V')])
+    tiers.close()
+    fine = list_sink.sinks['a_1s.csv']
+    coarse = list_sink.sinks['a_10s.csv']
+    assert fine.closed and coarse.closed
+    assert fine.rows[0] == [100.0, 2, 1.0, 3.0, 2.0]
+    # a row without a number is counted, but not rolled up
+    assert fine.rows[1][:2] == [101.0, 1] and math.isnan(fine.rows[1][2])
+    assert fine.rows[2] == [102.0, 1, 5.0, 5.0, 5.0]
+    assert fine.rows[3] == [110.0, 1, 7.0, 7.0, 7.0]
+    assert coarse.rows == [[100.0, 4, 1.0, 5.0, 3.0], [110.0, 1, 7.0, 7.0, 7.0]]
+
+
+def test_pick():
+    assert rollup.pick('a.csv', 0, 100, points=2000, Traw=0.1) == 'a.csv'
+    assert rollup.pick('a.csv', 0, 1000, points=2000, Traw=0.1) == 'a_1s.csv'
+    assert rollup.pick('a.csv', 0, 10000, points=2000, Traw=1.0) == 'a_60s.csv'
+    assert rollup.pick('a.csv', 0, 1e9, points=2000) == 'a_3600s.csv'
+
+
+def test_writer_norollup(tmp_path):
+    batch = writer.batch_writer(tiers=[1.0])
+    batch.start()
+    batch.write(str(tmp_path/'a.csv'), [(1.0, 1.0, 'V')], layout)
+    batch.write(str(tmp_path/'sweep.csv'), [(1.0, 1.0, 'V'), (1.0, 2.0, 'V')], layout, rollup=False)
+    batch.stop()
+    assert sorted(os.listdir(str(tmp_path))) == ['a.csv', 'a_1s.csv', 'sweep.csv']
@@ -0,0 +1,64 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# deadline clock of the driver loops (devices.scheduler)
+
+import time
+from devices import scheduler
+
+
+class fake_time():
+    # monotonic clock moved by the test
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_no_drift(monkeypatch):
+    clock_time = fake_time()
+    monkeypatch.setattr(scheduler, 'time', clock_time)
+    clock = scheduler.deadline_clock(1.0)
+    clock.start()
+    # a poll of 0.3 s does not add to the period
+    clock_time.now += 0.3
+    assert abs(clock.delay()-0.7) < 1e-9
+    clock_time.now = 101.0
+    clock.woke()
+    clock_time.now += 0.5
+    assert abs(clock.delay()-0.5) < 1e-9
+    assert clock.target == 102.0
+
+
+def test_overrun_skip(monkeypatch):
+    clock_time = fake_time()
+    monkeypatch.setattr(scheduler, 'time', clock_time)
+    clock = scheduler.deadline_clock(1.0, 'skip')
+    clock.start()
+    clock_time.now += 2.5
+    assert abs(clock.delay()-0.5) < 1e-9
+    assert clock.target == 103.0
+    assert clock.missed == 2
+
+
+def test_overrun_catchup(monkeypatch):
+    clock_time = fake_time()
+    monkeypatch.setattr(scheduler, 'time', clock_time)
+    clock = scheduler.deadline_clock(1.0, 'catchup')
+    clock.start()
+    clock_time.now += 2.5
+    assert clock.delay() is None
+    assert clock.delay() is None
+    assert abs(clock.delay()-0.5) < 1e-9
+    assert clock.missed == 2
+
+
+def test_wait_period():
+    clock = scheduler.deadline_clock(0.02)
+    tstart = time.monotonic()
+    clock.start()
+    for i in range(5):
+        clock.wait()
+    assert abs(time.monotonic()-tstart-0.1) < 0.05
+    assert clock.stats()['ticks'] == 5
@@ -0,0 +1,36 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# reply formats of the Keithley drivers (devices.scpi_binary)
+
+from devices import scpi_binary
+
+
+class inst_test():
+    def __init__(self, reply=''):
+        self.written = []
+        self.reply = reply
+
+    def write(self, cmd):
+        self.written.append(cmd)
+
+    def query(self, q):
+        return self.reply
+
+
+def test_decode_ascii():
+    assert scpi_binary.decode_ascii('+1.000000E-03\n') == [0.001]
+    assert scpi_binary.decode_ascii('+1.0E+00,-2.5E-01\n') == [1.0, -0.25]
+    assert scpi_binary.query_values(inst_test('+4.2E+00'), ':FETCh?', False, 1) == [4.2]
+
+
+def test_set_format():
+    inst = inst_test()
+    assert scpi_binary.set_format(inst, 'K2000', True, 'GPIB0')
+    assert inst.written == [':FORMat:DATA SREal', ':FORMat:BORDer SWAPped']
+    # ASCII only over RS-232
+    inst = inst_test()
+    assert not scpi_binary.set_format(inst, 'K2400', True, 'RS232')
+    assert inst.written == [':FORMat:DATA ASCii']
+    # the 2100 has no binary format
+    assert not scpi_binary.set_format(inst_test(), 'K2100', True, 'USB')
@@ -0,0 +1,45 @@
+# Licence: GNU General Public License version 2 (GPLv2)
+# (C) 2019-2021 Matthias H. Richter
+
+# session recorder (storage.session) with the SQLite format
+
+import os
+import time
+from storage import session
+from storage import sqlstore
+from storage import layouts
+
+
+class driver_stub():
+    name = 'K2000'
+
+    def label(self, idx):
+        return 'Cell'
+
+
+    def latency(self):
+        return 0.0
+
+
+def test_session_sqlite(tmp_path):
+    filename = os.path.join(str(tmp_path), 'session.db')
+    recorder = session.session_recorder(filename, Treorder=0.0, Tflush=0.05)
+    driver = driver_stub()
+    columns = layouts.get('K2000', 3)
+    now = time.time()
+    # out of order within the window
+    recorder.add(driver, 0, [(now+0.2, 3.0, 'VDC'), (now, 1.0, 'VDC')], columns)
+    recorder.add(driver, 0, [(now+0.1, 2.0, 'VDC')], columns)
+    # written by the session thread while running
+    time.sleep(0.5)
+    assert not recorder.failed
+    assert recorder.written == 3
+    recorder.stop()
+    reader = sqlstore.sqlite_reader(filename)
+    channels = reader.channels()
+    assert len(channels) == 1
+    assert channels[0][1:] == ('Cell', 'K2000', 'value', '')
+    rows = reader.range(('Cell', 'value'), now-1, now+1)
+    assert [row[1] for row in rows] == [1.0, 2.0, 3.0]
+    assert [row[1] for row in reader.last(channels[0][0], 2)] == [2.0, 3.0]
+    reader.close()